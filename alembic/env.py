@@ -35,6 +35,7 @@ from app.models.user import User
 from app.models.rest_record import RestRecord
 from app.models.gtd_task import GtdTask
 from app.models.video_process_task import VideoProcessTask
+from app.models.failed_notion_sync import FailedNotionSync
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,32 @@
+"""Add composite index (user_id, rest_time) on rest_records
+
+Revision ID: 3f9c2b7d1e4a
+Revises: 796f614d8ac3, a1b2c3d4e5f6
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2b7d1e4a'
+down_revision = ('796f614d8ac3', 'a1b2c3d4e5f6')
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 年度统计按 user_id + rest_time 区间扫描并按 rest_time 排序，
+    # 复合索引可直接走索引范围扫描，省去排序。
+    # CONCURRENTLY 不能在事务内执行，避免建索引期间阻塞写入
+    with op.get_context().autocommit_block():
+        op.execute(sa.text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_rest_records_user_time "
+            "ON rest_records (user_id, rest_time)"))
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(sa.text(
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_rest_records_user_time"))
@@ -0,0 +1,32 @@
+"""Add composite index (douyin_id, status) on video_process_tasks
+
+Revision ID: 7c1e5a9d2b3f
+Revises: 3f9c2b7d1e4a
+Create Date: 2026-10-15 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e5a9d2b3f'
+down_revision = '3f9c2b7d1e4a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 创建任务前的去重查询按去重键 + 已完成状态过滤，
+    # 复合索引可一次探查命中，不必在 douyin_id 命中行上再回表过滤 status。
+    # CONCURRENTLY 不能在事务内执行，避免建索引期间阻塞写入
+    with op.get_context().autocommit_block():
+        op.execute(sa.text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_video_process_tasks_key_status "
+            "ON video_process_tasks (douyin_id, status)"))
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(sa.text(
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_video_process_tasks_key_status"))
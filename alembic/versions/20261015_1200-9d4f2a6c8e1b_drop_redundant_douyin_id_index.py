@@ -0,0 +1,31 @@
+"""Drop single-column douyin_id index covered by (douyin_id, status)
+
+Revision ID: 9d4f2a6c8e1b
+Revises: 7c1e5a9d2b3f
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f2a6c8e1b'
+down_revision = '7c1e5a9d2b3f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # (douyin_id, status) 复合索引的前缀列已覆盖按 douyin_id 的查询，
+    # 单列索引只会增加每次写入的索引维护开销
+    with op.get_context().autocommit_block():
+        op.execute(sa.text(
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_video_process_tasks_douyin_id"))
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(sa.text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_video_process_tasks_douyin_id "
+            "ON video_process_tasks (douyin_id)"))
@@ -0,0 +1,37 @@
+"""Add failed_notion_sync table
+
+Revision ID: b5e8d3f1a7c2
+Revises: 9d4f2a6c8e1b
+Create Date: 2026-10-15 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e8d3f1a7c2'
+down_revision = '9d4f2a6c8e1b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # init_db 的 create_all 可能已在旧部署中建好此表
+    if sa.inspect(op.get_bind()).has_table('failed_notion_sync'):
+        return
+    op.create_table('failed_notion_sync',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False, comment='用户ID'),
+    sa.Column('record_id', sa.UUID(), nullable=False, comment='同步失败的休息记录ID'),
+    sa.Column('database_id', sa.String(), nullable=True, comment='Notion 数据库ID'),
+    sa.Column('error_message', sa.Text(), nullable=True, comment='错误信息'),
+    sa.Column('created_at', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_failed_notion_sync_user_id'), 'failed_notion_sync', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_failed_notion_sync_user_id'), table_name='failed_notion_sync')
+    op.drop_table('failed_notion_sync')
@@ -41,71 +41,36 @@ def upgrade():
         print("表 video_process_tasks 不存在，跳过迁移")
         return
 
-    # 检查字段是否已存在
-    result = connection.execute(sa.text("""
-        SELECT column_name
-        FROM information_schema.columns
-        WHERE table_schema = 'public'
-        AND table_name = 'video_process_tasks'
+    # 单条 ALTER TABLE 一次性添加所有字段，只获取一次表锁；
+    # IF NOT EXISTS 保证重复执行时幂等。
+    # task_type 带常量默认值，PostgreSQL 11+ 下无需重写表即可回填现有记录
+    op.execute(sa.text("""
+        ALTER TABLE video_process_tasks
+            ADD COLUMN IF NOT EXISTS task_type varchar DEFAULT 'process' NOT NULL,
+            ADD COLUMN IF NOT EXISTS media_type varchar,
+            ADD COLUMN IF NOT EXISTS aweme_id varchar,
+            ADD COLUMN IF NOT EXISTS "desc" text,
+            ADD COLUMN IF NOT EXISTS author varchar,
+            ADD COLUMN IF NOT EXISTS download_urls text
     """))
 
-    existing_columns = [row[0] for row in result.fetchall()]
-
-    # 添加 task_type 字段
-    if 'task_type' not in existing_columns:
-        # 先添加为可空列
-        op.add_column('video_process_tasks',
-                     sa.Column('task_type',
-                              sa.String(),
-                              nullable=True,
-                              index=True,
-                              comment='任务类型：parse-仅解析URL, process-完整处理'))
-        # 更新现有记录为 process 类型
-        connection.execute(sa.text("""
-            UPDATE video_process_tasks
-            SET task_type = 'process'
-            WHERE task_type IS NULL
-        """))
-        # 修改为不可空
-        op.alter_column('video_process_tasks', 'task_type',
-                       nullable=False,
-                       server_default='process')
-
-    # 添加解析结果字段
-    if 'media_type' not in existing_columns:
-        op.add_column('video_process_tasks',
-                     sa.Column('media_type',
-                              sa.String(),
-                              nullable=True,
-                              comment='媒体类型：video/image/live_photo'))
-
-    if 'aweme_id' not in existing_columns:
-        op.add_column('video_process_tasks',
-                     sa.Column('aweme_id',
-                              sa.String(),
-                              nullable=True,
-                              comment='抖音视频ID'))
-
-    if 'desc' not in existing_columns:
-        op.add_column('video_process_tasks',
-                     sa.Column('desc',
-                              sa.Text(),
-                              nullable=True,
-                              comment='视频描述'))
-
-    if 'author' not in existing_columns:
-        op.add_column('video_process_tasks',
-                     sa.Column('author',
-                              sa.String(),
-                              nullable=True,
-                              comment='作者昵称'))
-
-    if 'download_urls' not in existing_columns:
-        op.add_column('video_process_tasks',
-                     sa.Column('download_urls',
-                              sa.Text(),
-                              nullable=True,
-                              comment='下载链接列表（JSON格式）'))
+    # 字段注释
+    for column, comment in (
+        ('task_type', '任务类型：parse-仅解析URL, process-完整处理'),
+        ('media_type', '媒体类型：video/image/live_photo'),
+        ('aweme_id', '抖音视频ID'),
+        ('desc', '视频描述'),
+        ('author', '作者昵称'),
+        ('download_urls', '下载链接列表（JSON格式）'),
+    ):
+        op.execute(sa.text(
+            f'COMMENT ON COLUMN video_process_tasks."{column}" IS \'{comment}\''))
+
+    # 并发建索引，避免阻塞写入（CONCURRENTLY 不能在事务内执行）
+    with op.get_context().autocommit_block():
+        op.execute(sa.text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_video_process_tasks_task_type "
+            "ON video_process_tasks (task_type)"))
 
     print("数据库迁移完成 - 添加了 task_type 和解析结果字段")
 
@@ -114,6 +79,7 @@ def downgrade():
     """
     删除新增的字段
     """
+    op.execute(sa.text("DROP INDEX IF EXISTS ix_video_process_tasks_task_type"))
     op.drop_column('video_process_tasks', 'download_urls')
     op.drop_column('video_process_tasks', 'author')
     op.drop_column('video_process_tasks', 'desc')
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import get_current_user
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.models.gtd_task import GtdTask as GtdTaskModel
 from app.models.user import User
 from app.schemas.gtd_task import GtdTask, GtdTaskCreate
@@ -38,7 +38,7 @@ router = APIRouter()
              })
 async def create_gtd_task(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     task_in: GtdTaskCreate,
     current_user: User = Depends(get_current_user)
 ) -> GtdTask:
@@ -50,6 +50,5 @@ async def create_gtd_task(
                         category=task_in.category,
                         status=task_in.status)
     db.add(task)
-    db.commit()
-    db.refresh(task)
+    await db.commit()
     return task
@@ -1,19 +1,183 @@
-from ast import If
-from datetime import datetime
-from typing import List
-
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-
+import asyncio
+import logging
+import math
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from notion_client import APIResponseError
+from sqlalchemy import Integer, cast, extract, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
 from app.core.security import get_current_user
-from app.db.session import get_db
+from app.core.services.bark_service import bark_service
+from app.core.services.notion_service import notion_service
+from app.db.session import AsyncSessionLocal, get_async_db
+from app.models.failed_notion_sync import FailedNotionSync
 from app.models.rest_record import RestRecord as RestRecordModel
 from app.models.user import User
 from app.schemas.rest_record import (AnnualSummaryResponse,
                                      AnnualSummaryTableResponse, RestRecord,
-                                     RestRecordCreate, to_cn_timezone)
+                                     RestRecordBulkCreate, RestRecordCreate,
+                                     CN_TZ, to_cn_timezone)
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# 限制同时进行的 Notion 同步任务数，避免 Notion 故障时拖垮事件循环和出站连接
+_notion_sem = asyncio.Semaphore(8)
+
+
+def _year_range(year: str):
+    """返回北京时间下某一年的 [start_ts, end_ts) 时间戳区间"""
+    start_ts = int(datetime(int(year), 1, 1, tzinfo=CN_TZ).timestamp())
+    end_ts = int(datetime(int(year) + 1, 1, 1, tzinfo=CN_TZ).timestamp())
+    return start_ts, end_ts
+
+
+def _annual_records_stmt(user_id: str, year: str):
+    """年度统计查询：仅投影统计所需的列，返回轻量 Row 而非完整 ORM 对象"""
+    start_ts, end_ts = _year_range(year)
+    # 由数据库按北京时间计算月份，避免 Python 端逐条 strftime
+    month_num = cast(
+        extract('month',
+                func.timezone('Asia/Shanghai',
+                              func.to_timestamp(RestRecordModel.rest_time))),
+        Integer).label("month_num")
+    return select(
+        RestRecordModel.rest_time,
+        RestRecordModel.rest_type,
+        RestRecordModel.city,
+        RestRecordModel.wifi_name,
+        month_num,
+    ).where(
+        RestRecordModel.user_id == user_id,
+        RestRecordModel.rest_time >= start_ts,
+        RestRecordModel.rest_time < end_ts
+    ).order_by(RestRecordModel.rest_time.asc())
+
+
+def _city_counts_stmt(user_id: str, year: str):
+    """按城市分组计数（降序），同时统计起床记录数，由数据库一次完成聚合"""
+    start_ts, end_ts = _year_range(year)
+    count = func.count().label("record_count")
+    wake_count = func.count().filter(
+        RestRecordModel.rest_type == 1).label("wake_count")
+    return select(RestRecordModel.city, count, wake_count).where(
+        RestRecordModel.user_id == user_id,
+        RestRecordModel.rest_time >= start_ts,
+        RestRecordModel.rest_time < end_ts,
+        RestRecordModel.city.isnot(None),
+        RestRecordModel.city != "",
+    ).group_by(RestRecordModel.city).order_by(count.desc())
+
+
+async def _pair_sessions(records):
+    """
+    将按时间升序排列的记录配对为睡眠会话（单次线性遍历）
+
+    只保留一条待配对的睡眠记录，遇到起床记录时尝试与之配对；
+    无法配对的睡眠/起床记录作为孤立会话输出。records 为异步流式结果。
+    """
+    pending = None
+    async for r in records:
+        if r.rest_type == 0: # 睡眠
+            if pending:
+                yield {"sleep": pending, "wake": None, "dur": None}
+            pending = r
+            continue
+
+        # 起床
+        if pending:
+            dur = (r.rest_time - pending.rest_time) / 3600.0
+            if 0 < dur < 24:
+                yield {"sleep": pending, "wake": r, "dur": dur}
+                pending = None
+                continue
+            yield {"sleep": pending, "wake": None, "dur": None}
+            pending = None
+        yield {"sleep": None, "wake": r, "dur": None}
+
+    if pending:
+        yield {"sleep": pending, "wake": None, "dur": None}
+
+
+def _missing_dates(flags: bytearray, start_date: date, end_date: date) -> List[str]:
+    """返回 [start_date, end_date] 内未被标记的日期（flags 按距 start_date 的天数索引）"""
+    return [(start_date + timedelta(d)).isoformat()
+            for d in range((end_date - start_date).days + 1) if not flags[d]]
+
+
+def _max_streak(active_doy: bytearray) -> int:
+    """按天位图计算最长连续有记录的天数（单次线性扫描）"""
+    max_streak = 0
+    current_streak = 0
+    for active in active_doy:
+        if active:
+            current_streak += 1
+            if current_streak > max_streak: max_streak = current_streak
+        else:
+            current_streak = 0
+    return max_streak
+
+
+async def _sync_rest_record_to_notion(rest_record: RestRecordModel):
+    """将休息记录同步到 Notion（重试由 notion_service 负责），失败时记录并发送 Bark 通知"""
+    database_id = (settings.NOTION_WAKE_DATABASE_ID if rest_record.rest_type
+                   == 1 else settings.NOTION_SLEEP_DATABASE_ID)
+    async with _notion_sem:
+        try:
+            result = await notion_service.add_rest_record(
+                database_id=database_id, record=rest_record)
+        except APIResponseError as e:
+            # 不可恢复的 4xx 错误
+            error = str(e)
+        else:
+            if result.ok:
+                return
+            error = result.error or "Notion提交失败"
+
+    await _record_failed_notion_sync(rest_record, database_id, error)
+    await bark_service.send_notification(
+        title="Notion同步失败",
+        content=f"休息记录同步失败: {error}")
+
+
+async def _record_failed_notion_sync(rest_record: RestRecordModel,
+                                     database_id: Optional[str],
+                                     error_message: str):
+    """持久化 Notion 同步失败记录"""
+    try:
+        async with AsyncSessionLocal() as session:
+            session.add(
+                FailedNotionSync(user_id=rest_record.user_id,
+                                 record_id=rest_record.id,
+                                 database_id=database_id,
+                                 error_message=error_message))
+            await session.commit()
+    except Exception:
+        logger.exception("Notion 同步失败记录写入失败")
+
+
+async def _get_last_rest_type(db: AsyncSession, user_id: str) -> Optional[int]:
+    """获取用户最新一条记录的休息类型"""
+    result = await db.execute(
+        select(RestRecordModel.rest_type).where(
+            RestRecordModel.user_id == user_id).order_by(
+                RestRecordModel.rest_time.desc()).limit(1))
+    return result.scalar()
+
+
+def _next_rest_type_expr(user_id: str):
+    """
+    休息类型推断表达式：与用户最新一条记录交替，无记录时为睡眠
+    作为 INSERT 的列值由数据库在写入时计算，无需额外往返，也不依赖进程内状态
+    """
+    last_rest_type = select(RestRecordModel.rest_type).where(
+        RestRecordModel.user_id == user_id).order_by(
+            RestRecordModel.rest_time.desc()).limit(1).scalar_subquery()
+    return func.coalesce(1 - last_rest_type, 0)
 
 
 @router.post("/",
@@ -42,7 +206,7 @@ router = APIRouter()
              })
 async def create_rest_record(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     rest_record_in: RestRecordCreate,
     current_user: User = Depends(get_current_user)
 ) -> RestRecord:
@@ -53,77 +217,104 @@ async def create_rest_record(
     - 0: 睡眠
     - 1: 起床
     """
-    # 1. 确定休息类型
+    # 1. 确定休息类型（未指定时由数据库在 INSERT 内按最新记录推断）
     rest_type = rest_record_in.rest_type
     if rest_type is None:
-        # 获取最新的一条记录来判断
-        last_record = db.query(RestRecordModel).filter(
-            RestRecordModel.user_id == current_user.id
-        ).order_by(RestRecordModel.rest_time.desc()).first()
-        
-        if last_record:
-            rest_type = 1 - last_record.rest_type
-        else:
-            rest_type = 0  # 默认第一条是睡眠
+        rest_type = _next_rest_type_expr(current_user.id)
 
     # 2. 处理时间（修复时区问题：确保 month_str 与 rest_time 统一基于北京时间）
-    cn_now = to_cn_timezone(int(datetime.now().timestamp()))
+    cn_now = datetime.now(CN_TZ)
     rest_time_ts = int(cn_now.timestamp())
-    month_str = cn_now.strftime('%m月')
-
-    rest_record = RestRecordModel(user_id=current_user.id,
-                                  rest_type=rest_type,
-                                  wifi_name=rest_record_in.wifi_name,
-                                  latitude=rest_record_in.latitude,
-                                  longitude=rest_record_in.longitude,
-                                  city=rest_record_in.city,
-                                  rest_time=rest_time_ts,
-                                  month_str=month_str)
-    db.add(rest_record)
-    db.commit()
-    db.refresh(rest_record)
+    month_str = f"{cn_now.month:02d}月"
+
+    rest_record = await db.scalar(
+        insert(RestRecordModel).values(user_id=current_user.id,
+                                       rest_type=rest_type,
+                                       wifi_name=rest_record_in.wifi_name,
+                                       latitude=rest_record_in.latitude,
+                                       longitude=rest_record_in.longitude,
+                                       city=rest_record_in.city,
+                                       rest_time=rest_time_ts,
+                                       month_str=month_str).returning(RestRecordModel))
+    await db.commit()
 
     # --- 新增异步业务流程 ---
-    import asyncio
-
-    from app.core.config import settings
-    from app.core.services.bark_service import BarkService
-    from app.core.services.notion_service import NotionService
-
-    async def notion_and_bark_task():
-        notion_service = NotionService(token=settings.NOTION_TOKEN)
-        bark_service = BarkService(
-            base_url=settings.BARK_BASE_URL,
-            default_device_key=settings.BARK_DEFAULT_DEVICE_KEY)
-        retry_count = 0
-        max_retries = 3
-        while retry_count < max_retries:
-            try:
-                page_id = await notion_service.add_rest_record(
-                    database_id=settings.NOTION_WAKE_DATABASE_ID
-                    if rest_type == 1 else
-                    settings.NOTION_SLEEP_DATABASE_ID,
-                    record=rest_record)
-                if not page_id:
-                    raise Exception("Notion提交失败")
-                break
-            except Exception as e:
-                retry_count += 1
-                if retry_count == max_retries:
-                    # 重试3次后仍失败，发 Bark 通知
-                    await bark_service.send_notification(
-                        title="Notion同步失败",
-                        content=f"休息记录同步失败（重试{max_retries}次）: {str(e)}")
-                else:
-                    # 重试间隔，例如 1 秒
-                    await asyncio.sleep(1)
-
-    asyncio.create_task(notion_and_bark_task())
+    asyncio.create_task(_sync_rest_record_to_notion(rest_record))
     # --- 业务流程结束 ---
 
     return rest_record
 
 
+@router.post("/bulk",
+             response_model=List[RestRecord],
+             status_code=status.HTTP_201_CREATED,
+             summary="批量创建休息记录",
+             description="""
+    批量创建休息记录（例如客户端离线后批量同步），所有记录在同一事务中一次性写入。
+
+    - **休息类型**: 不传时按时间顺序与上一条记录交替推断
+    - **休息时间**: 可选时间戳，不传则使用当前时间
+    """,
+             responses={
+                 201: {
+                     "description": "创建成功"
+                 },
+                 401: {
+                     "description": "未授权"
+                 },
+                 422: {
+                     "description": "请求参数验证失败"
+                 },
+             })
+async def create_rest_records_bulk(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    records_in: List[RestRecordBulkCreate],
+    current_user: User = Depends(get_current_user)
+) -> List[RestRecord]:
+    """
+    批量创建休息记录，单条 INSERT ... RETURNING 完成写入
+    """
+    if not records_in:
+        return []
+
+    now_ts = int(datetime.now(CN_TZ).timestamp())
+    records_in = sorted(records_in, key=lambda r: r.rest_time or now_ts)
+
+    last_rest_type = None
+    if any(r.rest_type is None for r in records_in):
+        last_rest_type = await _get_last_rest_type(db, current_user.id)
+
+    rows = []
+    for rec in records_in:
+        rest_type = rec.rest_type
+        if rest_type is None:
+            rest_type = 1 - last_rest_type if last_rest_type is not None else 0
+        last_rest_type = rest_type
+
+        rest_time_ts = rec.rest_time or now_ts
+        rows.append({
+            "user_id": current_user.id,
+            "rest_type": rest_type,
+            "wifi_name": rec.wifi_name,
+            "latitude": rec.latitude,
+            "longitude": rec.longitude,
+            "city": rec.city,
+            "rest_time": rest_time_ts,
+            "month_str": f"{to_cn_timezone(rest_time_ts).month:02d}月",
+        })
+
+    result = await db.scalars(
+        insert(RestRecordModel).returning(RestRecordModel), rows)
+    rest_records = result.all()
+    await db.commit()
+
+    for rest_record in rest_records:
+        asyncio.create_task(_sync_rest_record_to_notion(rest_record))
+
+    return rest_records
+
+
 @router.get("/",
             response_model=List[RestRecord],
             summary="获取休息记录列表",
@@ -143,86 +334,66 @@ async def create_rest_record(
                 },
             })
 async def get_rest_records(*,
-                           db: Session = Depends(get_db),
+                           db: AsyncSession = Depends(get_async_db),
                            current_user: User = Depends(get_current_user),
                            skip: int = 0,
                            limit: int = 100) -> List[RestRecord]:
     """
     获取当前用户的休息记录列表
     """
+    result = await db.execute(
+        select(RestRecordModel).where(
+            RestRecordModel.user_id == current_user.id).order_by(
+                RestRecordModel.rest_time.desc()).offset(skip).limit(limit))
+    return result.scalars().all()
+
+
 @router.get("/annual-summary/{year}/table",
             response_model=AnnualSummaryTableResponse,
             summary="获取年度睡眠总结明细表",
             description="返回一整年每一天的睡眠会话明细，包括入睡/起床时间、时长及位置，用于查漏补缺。")
 async def get_annual_summary_table(
     year: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ) -> AnnualSummaryTableResponse:
     # 复用统计算法中的配对逻辑
-    from datetime import date, timedelta
-    start_ts = int(datetime.strptime(f"{year}-01-01 00:00:00", "%Y-%m-%d %H:%M:%S").timestamp())
-    end_ts = int(datetime.strptime(f"{year}-12-31 23:59:59", "%Y-%m-%d %H:%M:%S").timestamp())
-    records = db.query(RestRecordModel).filter(
-        RestRecordModel.user_id == current_user.id,
-        RestRecordModel.rest_time >= start_ts,
-        RestRecordModel.rest_time <= end_ts
-    ).order_by(RestRecordModel.rest_time.asc()).all()
-
-    if not records:
-        return {"year": year, "count": 0, "records": []}
+    records = await db.stream(_annual_records_stmt(
+        current_user.id, year).execution_options(yield_per=500))
 
     # 核心配对算法
     sessions = []
-    i = 0
-    used_records = set()
-    while i < len(records):
-        if i in used_records:
-            i += 1
-            continue
-        
-        r = records[i]
-        if r.rest_type == 0: # 睡眠
-            found_wake = False
-            for j in range(i + 1, min(i + 10, len(records))):
-                if records[j].rest_type == 1: # 起床
-                    dt_s = to_cn_timezone(r.rest_time)
-                    dt_w = to_cn_timezone(records[j].rest_time)
-                    dur = (records[j].rest_time - r.rest_time) / 3600.0
-                    if 0 < dur < 24:
-                        sessions.append({
-                            "date": dt_w.strftime('%Y-%m-%d'),
-                            "sleep_time": dt_s.strftime('%H:%M'),
-                            "wake_time": dt_w.strftime('%H:%M'),
-                            "duration": round(dur, 2),
-                            "city": records[j].city or r.city,
-                            "wifi": records[j].wifi_name or r.wifi_name
-                        })
-                        used_records.add(i)
-                        used_records.add(j)
-                        found_wake = True
-                        break
-            if not found_wake:
-                dt_s = to_cn_timezone(r.rest_time)
-                sessions.append({
-                    "date": dt_s.strftime('%Y-%m-%d'),
-                    "sleep_time": dt_s.strftime('%H:%M'),
-                    "wake_time": None,
-                    "duration": None,
-                    "city": r.city,
-                    "wifi": r.wifi_name
-                })
+    async for sess in _pair_sessions(records):
+        sleep, wake = sess["sleep"], sess["wake"]
+        dt_s = to_cn_timezone(sleep.rest_time) if sleep else None
+        dt_w = to_cn_timezone(wake.rest_time) if wake else None
+        if sleep and wake:
+            sessions.append({
+                "date": dt_w.date().isoformat(),
+                "sleep_time": f"{dt_s.hour:02d}:{dt_s.minute:02d}",
+                "wake_time": f"{dt_w.hour:02d}:{dt_w.minute:02d}",
+                "duration": round(sess["dur"], 2),
+                "city": wake.city or sleep.city,
+                "wifi": wake.wifi_name or sleep.wifi_name
+            })
+        elif sleep: # 未配对的睡眠
+            sessions.append({
+                "date": dt_s.date().isoformat(),
+                "sleep_time": f"{dt_s.hour:02d}:{dt_s.minute:02d}",
+                "wake_time": None,
+                "duration": None,
+                "city": sleep.city,
+                "wifi": sleep.wifi_name
+            })
         else: # 未配对的起床
-            dt_w = to_cn_timezone(r.rest_time)
             sessions.append({
-                "date": dt_w.strftime('%Y-%m-%d'),
+                "date": dt_w.date().isoformat(),
                 "sleep_time": None,
-                "wake_time": dt_w.strftime('%H:%M'),
+                "wake_time": f"{dt_w.hour:02d}:{dt_w.minute:02d}",
                 "duration": None,
-                "city": r.city,
-                "wifi": r.wifi_name
+                "city": wake.city,
+                "wifi": wake.wifi_name
             })
-        i += 1
 
     return {
         "year": year,
@@ -237,178 +408,135 @@ async def get_annual_summary_table(
             description="从多个维度统计用户一整年的入睡和起床数据，生成年度报告。")
 async def get_annual_summary(
     year: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ) -> AnnualSummaryResponse:
-    import statistics
-    from collections import Counter
-    from datetime import date, timedelta
-
-    start_ts = int(datetime.strptime(f"{year}-01-01 00:00:00", "%Y-%m-%d %H:%M:%S").timestamp())
-    end_ts = int(datetime.strptime(f"{year}-12-31 23:59:59", "%Y-%m-%d %H:%M:%S").timestamp())
+    # 流式读取：配对只需要回看一条记录，按批拉取即可，无需一次性加载全年数据
+    records = await db.stream(_annual_records_stmt(
+        current_user.id, year).execution_options(yield_per=500))
 
-    records = db.query(RestRecordModel).filter(
-        RestRecordModel.user_id == current_user.id,
-        RestRecordModel.rest_time >= start_ts,
-        RestRecordModel.rest_time <= end_ts
-    ).order_by(RestRecordModel.rest_time.asc()).all()
-
-    if not records:
-        from fastapi import HTTPException
-        raise HTTPException(status_code=404, detail=f"未找到 {year} 年的休息记录")
-
-    # --- 改进的配对与统计逻辑 ---
-    sessions = []
-    i = 0
-    used_records = set()
-    while i < len(records):
-        if i in used_records:
-            i += 1
-            continue
-        r = records[i]
-        if r.rest_type == 0: # 睡眠
-            found_wake = False
-            for j in range(i + 1, min(i + 10, len(records))):
-                if records[j].rest_type == 1:
-                    dur = (records[j].rest_time - r.rest_time) / 3600.0
-                    if 0 < dur < 24:
-                        sessions.append({"sleep": r, "wake": records[j], "dur": dur})
-                        used_records.add(i)
-                        used_records.add(j)
-                        found_wake = True
-                        break
-            if not found_wake:
-                sessions.append({"sleep": r, "wake": None, "dur": None})
-        else: # 孤立起床
-            sessions.append({"sleep": None, "wake": r, "dur": None})
-        i += 1
-
-    # 建立日期索引（以起床日期为准）
-    daily_sessions = {} # {date_str: session}
-    for s in sessions:
-        ref_record = s['wake'] or s['sleep']
-        d_str = to_cn_timezone(ref_record.rest_time).strftime('%Y-%m-%d')
-        daily_sessions[d_str] = s
-
-    # --- 数据质量分析 ---
+    # --- 流式配对与统计：只保留累计量，不物化全部会话 ---
     start_date = date(int(year), 1, 1)
-    end_date = min(date(int(year), 12, 31), date.today())
-    missing_sleep = []
-    missing_wake = []
-    
-    curr = start_date
-    while curr <= end_date:
-        d_str = curr.strftime('%Y-%m-%d')
-        s = daily_sessions.get(d_str)
-        if not s or not s['sleep']: missing_sleep.append(d_str)
-        if not s or not s['wake']: missing_wake.append(d_str)
-        curr += timedelta(days=1)
-
-    # --- 核心指标计算 ---
-    sleep_times = [] # 秒
-    wake_times = []  # 秒
-    durations = []   # 小时
-    monthly = {}     # {month_str: {"total_dur": 0, "dur_count": 0, "record_count": 0}}
-
-    latest_sleep = {"time": 0, "date": "", "val": ""}
-    earliest_wake = {"time": 86400, "date": "", "val": ""}
-    longest_sleep = {"dur": 0, "date": "", "val": ""}
-    shortest_sleep = {"dur": 100, "date": "", "val": ""}
-
-    for s in sessions:
-        m_str = to_cn_timezone((s['wake'] or s['sleep']).rest_time).strftime('%m月')
-        if m_str not in monthly: monthly[m_str] = {"total_dur": 0, "dur_count": 0, "record_count": 0}
-        
-        if s['sleep']:
-            dt_s = to_cn_timezone(s['sleep'].rest_time)
+    start_ord = start_date.toordinal()
+    # 按年内天序号标记的日期位图（以起床日期为准）
+    active_doy = bytearray(367)
+    had_sleep = bytearray(367)
+    had_wake = bytearray(367)
+    monthly = {}     # {month_num: {"total_dur": 0, "dur_count": 0, "record_count": 0}}
+
+    sleep_n, sleep_mean, sleep_m2 = 0, 0.0, 0.0  # 入睡时刻（秒），Welford 在线方差
+    wake_n, wake_sum = 0, 0                      # 起床时刻（秒）
+    dur_n, dur_sum = 0, 0.0                      # 睡眠时长（小时）
+
+    # 极值只记录取值与对应时间，循环结束后再格式化胜出的 4 条
+    latest_sleep_tod, latest_sleep_dt = 0, None
+    earliest_wake_tod, earliest_wake_dt = 86400, None
+    longest_dur, longest_dt = 0, None
+    shortest_dur, shortest_dt = 100, None
+
+    async for s in _pair_sessions(records):
+        # 每条记录只转换一次时区，后续复用
+        dt_s = to_cn_timezone(s['sleep'].rest_time) if s['sleep'] else None
+        dt_w = to_cn_timezone(s['wake'].rest_time) if s['wake'] else None
+        ref = s['wake'] or s['sleep']
+        doy = (dt_w or dt_s).toordinal() - start_ord
+        active_doy[doy] = 1
+        # 同一天有多个会话时以最后一个为准（缺失统计沿用按日期覆盖的口径）
+        had_sleep[doy] = dt_s is not None
+        had_wake[doy] = dt_w is not None
+        m = monthly.get(ref.month_num)
+        if m is None: m = monthly[ref.month_num] = {"total_dur": 0, "dur_count": 0, "record_count": 0}
+
+        if dt_s:
             s_hour = dt_s.hour
             s_tod = s_hour * 3600 + dt_s.minute * 60 + dt_s.second
             if s_hour < 12: s_tod += 86400 # 跨天处理
-            sleep_times.append(s_tod)
-            if s_tod > latest_sleep["time"]:
-                latest_sleep = {"time": s_tod, "date": dt_s.strftime('%m-%d'), "val": dt_s.strftime('%H:%M')}
-            monthly[m_str]["record_count"] += 1
-
-        if s['wake']:
-            dt_w = to_cn_timezone(s['wake'].rest_time)
+            sleep_n += 1
+            delta = s_tod - sleep_mean
+            sleep_mean += delta / sleep_n
+            sleep_m2 += delta * (s_tod - sleep_mean)
+            if s_tod > latest_sleep_tod:
+                latest_sleep_tod, latest_sleep_dt = s_tod, dt_s
+            m["record_count"] += 1
+
+        if dt_w:
             w_tod = dt_w.hour * 3600 + dt_w.minute * 60 + dt_w.second
-            wake_times.append(w_tod)
-            if w_tod < earliest_wake["time"]:
-                earliest_wake = {"time": w_tod, "date": dt_w.strftime('%m-%d'), "val": dt_w.strftime('%H:%M')}
-            if not s['sleep']: # 如果是孤立起床，也计入频次
-                monthly[m_str]["record_count"] += 1
+            wake_n += 1
+            wake_sum += w_tod
+            if w_tod < earliest_wake_tod:
+                earliest_wake_tod, earliest_wake_dt = w_tod, dt_w
+            if not dt_s: # 如果是孤立起床，也计入频次
+                m["record_count"] += 1
 
         if s['dur'] and 1 < s['dur'] < 24:
-            durations.append(s['dur'])
-            monthly[m_str]["total_dur"] += s['dur']
-            monthly[m_str]["dur_count"] += 1
-            dt_w = to_cn_timezone(s['wake'].rest_time)
-            if s['dur'] > longest_sleep["dur"]:
-                longest_sleep = {"dur": s['dur'], "date": dt_w.strftime('%m-%d'), "val": f"{s['dur']:.1f}h"}
-            if s['dur'] < shortest_sleep["dur"]:
-                shortest_sleep = {"dur": s['dur'], "date": dt_w.strftime('%m-%d'), "val": f"{s['dur']:.1f}h"}
-
-    avg_s = sum(sleep_times)/len(sleep_times) if sleep_times else 0
-    avg_w = sum(wake_times)/len(wake_times) if wake_times else 0
-    avg_d = sum(durations)/len(durations) if durations else 0
-
-    def format_tod(seconds):
-        seconds = seconds % 86400
-        h = int(seconds // 3600)
-        m = int((seconds % 3600) // 60)
-        return f"{h:02d}:{m:02d}"
+            dur_n += 1
+            dur_sum += s['dur']
+            m["total_dur"] += s['dur']
+            m["dur_count"] += 1
+            if s['dur'] > longest_dur:
+                longest_dur, longest_dt = s['dur'], dt_w
+            if s['dur'] < shortest_dur:
+                shortest_dur, shortest_dt = s['dur'], dt_w
+
+    total_days_logged = active_doy.count(1)
+    if not total_days_logged:
+        raise HTTPException(status_code=404, detail=f"未找到 {year} 年的休息记录")
+
+    # --- 数据质量分析 ---
+    end_date = min(date(int(year), 12, 31), date.today())
+    missing_sleep = _missing_dates(had_sleep, start_date, end_date)
+    missing_wake = _missing_dates(had_wake, start_date, end_date)
+
+    avg_s = sleep_mean
+    avg_w = wake_sum/wake_n if wake_n else 0
+    avg_d = dur_sum/dur_n if dur_n else 0
+
+    # 平均时刻（秒，可能跨天）→ 时、分
+    avg_s_h, avg_s_m = divmod(int(avg_s % 86400) // 60, 60)
+    avg_w_h, avg_w_m = divmod(int(avg_w % 86400) // 60, 60)
+
+    def format_extreme(dt, value, description):
+        if dt is None:
+            return {"date": "", "value": "", "description": description}
+        return {"date": f"{dt.month:02d}-{dt.day:02d}", "value": value, "description": description}
 
     # --- 连续天数 ---
-    max_streak = 0
-    current_streak = 0
-    all_active_days = sorted(daily_sessions.keys())
-    if all_active_days:
-        prev_d = datetime.strptime(all_active_days[0], '%Y-%m-%d').date()
-        current_streak = 1
-        max_streak = 1
-        for i in range(1, len(all_active_days)):
-            curr_d = datetime.strptime(all_active_days[i], '%Y-%m-%d').date()
-            if (curr_d - prev_d).days == 1:
-                current_streak += 1
-            else:
-                current_streak = 1
-            max_streak = max(max_streak, current_streak)
-            prev_d = curr_d
-
-    stdev_s = statistics.stdev(sleep_times) if len(sleep_times) > 1 else 3600
+    max_streak = _max_streak(active_doy)
+
+    stdev_s = math.sqrt(sleep_m2 / (sleep_n - 1)) if sleep_n > 1 else 3600
     consistency_score = max(0, min(100, int(100 - (stdev_s / 3600) * 10))) 
 
     # --- 空间统计 ---
-    all_cities = [r.city for r in records if r.city]
-    distinct_cities_count = len(set(all_cities))
-    wake_cities = [r.city for r in records if r.city and r.rest_type == 1]
-    distinct_wake_cities_count = len(set(wake_cities))
+    city_rows = (await db.execute(
+        _city_counts_stmt(current_user.id, year))).all()
+    distinct_cities_count = len(city_rows)
+    distinct_wake_cities_count = sum(1 for r in city_rows if r.wake_count)
 
     return {
         "overview": {
             "year": year,
-            "total_days_logged": len(daily_sessions),
+            "total_days_logged": total_days_logged,
             "distinct_cities_count": distinct_cities_count,
             "distinct_wake_cities_count": distinct_wake_cities_count,
-            "avg_sleep_time": format_tod(avg_s),
-            "avg_wake_time": format_tod(avg_w),
+            "avg_sleep_time": f"{avg_s_h:02d}:{avg_s_m:02d}",
+            "avg_wake_time": f"{avg_w_h:02d}:{avg_w_m:02d}",
             "avg_duration_hrs": round(avg_d, 1)
         },
         "extremes": {
-            "latest_sleep": {"date": latest_sleep["date"], "value": latest_sleep["val"], "description": "全年最晚入睡"},
-            "earliest_wake": {"date": earliest_wake["date"], "value": earliest_wake["val"], "description": "全年最早起床"},
-            "longest_sleep": {"date": longest_sleep["date"], "value": longest_sleep["val"], "description": "全年最长睡眠"},
-            "shortest_sleep": {"date": shortest_sleep["date"], "value": shortest_sleep["val"], "description": "全年最短睡眠"}
+            "latest_sleep": format_extreme(latest_sleep_dt, latest_sleep_dt and f"{latest_sleep_dt.hour:02d}:{latest_sleep_dt.minute:02d}", "全年最晚入睡"),
+            "earliest_wake": format_extreme(earliest_wake_dt, earliest_wake_dt and f"{earliest_wake_dt.hour:02d}:{earliest_wake_dt.minute:02d}", "全年最早起床"),
+            "longest_sleep": format_extreme(longest_dt, f"{longest_dur:.1f}h", "全年最长睡眠"),
+            "shortest_sleep": format_extreme(shortest_dt, f"{shortest_dur:.1f}h", "全年最短睡眠")
         },
         "consistency": {
             "max_streak": max_streak,
             "consistency_score": consistency_score,
             "remark": "作息稳如泰山" if consistency_score > 85 else "作息略显随性"
         },
-        "spatial": [{"name": n, "count": c, "type": "city"} for n, c in Counter(all_cities).most_common(2)],
+        "spatial": [{"name": r.city, "count": r.record_count, "type": "city"} for r in city_rows[:2]],
         "monthly_trends": [
             {
-                "month": m, 
+                "month": f"{m:02d}月",
                 "avg_duration": round(float(v["total_dur"] / v["dur_count"]), 1) if v["dur_count"] > 0 else 0.0, 
                 "record_count": v["record_count"]
             } for m, v in sorted(monthly.items())
@@ -1,9 +1,10 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status
 from app.core.security import get_current_user
 from app.models.user import User
 from app.schemas.telegram import TelegramDownloadRequest, TelegramDownloadResponse
 from app.services.telegram_service import telegram_service
+from app.workers.video_worker import job_queue
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -34,7 +35,6 @@ async def background_download(url: str, user_id: str):
     """)
 async def download_via_telegram(
     request: TelegramDownloadRequest,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user)
 ) -> TelegramDownloadResponse:
     """
@@ -43,8 +43,8 @@ async def download_via_telegram(
     try:
         logger.info(f"User {current_user.id} requested Telegram download for URL: {request.url}")
         
-        # 添加到后台任务
-        background_tasks.add_task(background_download, request.url, str(current_user.id))
+        # 提交到后台任务队列
+        job_queue.enqueue(background_download, request.url, str(current_user.id))
         
         return TelegramDownloadResponse(
             success=True,
@@ -6,11 +6,14 @@
 import asyncio
 import logging
 from typing import Optional
-from fastapi import APIRouter, Depends, BackgroundTasks, status, HTTPException
-from sqlalchemy.orm import Session
+from uuid import UUID
+from fastapi import APIRouter, Depends, Header, Response, status, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
 from app.core.security import get_current_user
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.models.user import User
 from app.models.video_process_task import VideoProcessTask
 from app.schemas.video_process_task import (
@@ -21,25 +24,12 @@ from app.schemas.video_process_task import (
     VideoParseResponse
 )
 from app.core.services.video_processor_service import VideoProcessorService
+from app.workers.video_worker import job_queue, process_video_task
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-async def process_video_task(
-    task_id: str,
-    video_url: str,
-    db: Session
-):
-    """后台视频处理任务"""
-    try:
-        processor = VideoProcessorService(db)
-        await processor.process_video(task_id, video_url)
-    except Exception as e:
-        # 错误已在processor中处理并记录
-        pass
-
-
 @router.post("/",
              response_model=VideoProcessResponse,
              status_code=status.HTTP_201_CREATED,
@@ -79,8 +69,7 @@ async def process_video_task(
              })
 async def create_video_process_task(
     *,
-    db: Session = Depends(get_db),
-    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
     request: VideoProcessRequest,
     current_user: User = Depends(get_current_user)
 ) -> VideoProcessResponse:
@@ -89,9 +78,10 @@ async def create_video_process_task(
 
     接收视频URL，创建任务并立即返回task_id，后台异步执行处理流程。
     """
-    # 检查是否已存在处理记录（去重）
-    processor = VideoProcessorService(db)
-    existing_task = processor.check_existing_task(request.video_url)
+    # 检查是否已存在处理记录（去重；抖音短链不在此解析跳转，由后台任务解析后再查重）
+    processor = VideoProcessorService()
+    video_key = processor.get_video_key(request.video_url)
+    existing_task = await processor.check_existing_task(db, video_key) if video_key else None
 
     if existing_task:
         # 已存在完成的任务，直接返回
@@ -105,19 +95,18 @@ async def create_video_process_task(
     task = VideoProcessTask(
         user_id=current_user.id,
         task_type=VideoProcessTask.TASK_TYPE_PROCESS,
+        douyin_id=video_key,
         original_url=request.video_url,
         status=VideoProcessTask.STATUS_PENDING
     )
     db.add(task)
-    db.commit()
-    db.refresh(task)
+    await db.commit()
 
-    # 添加后台任务
-    background_tasks.add_task(
+    # 提交到后台任务队列
+    job_queue.enqueue(
         process_video_task,
         task_id=str(task.id),
-        video_url=request.video_url,
-        db=db
+        video_url=request.video_url
     )
 
     return VideoProcessResponse(
@@ -143,11 +132,16 @@ async def create_video_process_task(
         - 完成后返回：视频路径、音频路径、字幕文字、AI总结
         - 处理中返回：当前状态
         - 失败时返回：错误信息
+
+    - **轮询缓存**: 响应带 `ETag`，轮询时携带 `If-None-Match`，任务未变化返回 304
     """,
             responses={
                  200: {
                      "description": "查询成功"
                  },
+                 304: {
+                     "description": "任务未变化"
+                 },
                  401: {
                      "description": "未授权"
                  },
@@ -160,8 +154,10 @@ async def create_video_process_task(
              })
 async def get_video_process_task(
     *,
-    db: Session = Depends(get_db),
-    task_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    task_id: UUID,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user)
 ) -> VideoProcessTaskResponse:
     """
@@ -169,10 +165,19 @@ async def get_video_process_task(
 
     通过task_id查询任务的详细状态，如果是已完成的任务，同时返回处理结果。
     """
-    # 查询任务
-    task = db.query(VideoProcessTask).filter(
-        VideoProcessTask.id == task_id
-    ).first()
+    # 查询任务：轮询路径只取状态相关列，总结只在库内取长度，不加载字幕、总结等大字段
+    row = (await db.execute(
+        select(VideoProcessTask, func.length(VideoProcessTask.ai_summary))
+        .options(load_only(
+            VideoProcessTask.id,
+            VideoProcessTask.user_id,
+            VideoProcessTask.status,
+            VideoProcessTask.original_url,
+            VideoProcessTask.updated_at
+        ))
+        .where(VideoProcessTask.id == task_id)
+    )).first()
+    task, summary_len = row if row else (None, None)
 
     if not task:
         raise HTTPException(
@@ -187,8 +192,16 @@ async def get_video_process_task(
             detail="无权限访问此任务"
         )
 
+    # 任务未变化时直接返回 304（流式总结在同一秒内可能多次更新，因此带上总结长度）
+    etag = f'"{task.updated_at}-{task.status}-{summary_len or 0}"'
+    if if_none_match == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
     # 根据状态返回不同的响应
     if task.status == VideoProcessTask.STATUS_COMPLETED:
+        # 完成后再补充加载结果字段
+        await db.refresh(task, ["ai_summary", "video_path", "audio_path", "subtitle_text"])
         # 完成任务返回完整结果
         return VideoProcessTaskResponse(
             task_id=task.id,
@@ -201,11 +214,14 @@ async def get_video_process_task(
             message="查询成功"
         )
     else:
-        # 未完成任务返回状态信息
+        # 未完成任务返回状态信息（处理中时附带已流式生成的部分总结）
+        partial = task.status == VideoProcessTask.STATUS_PROCESSING and summary_len
+        if partial:
+            await db.refresh(task, ["ai_summary"])
         return VideoProcessTaskResponse(
             task_id=task.id,
             status=task.status,
-            summary=None,
+            summary=task.ai_summary if partial else None,
             original_url=task.original_url,
             video_path=None,
             audio_path=None,
@@ -255,7 +271,6 @@ async def get_video_process_task(
              })
 async def parse_video_url(
     *,
-    db: Session = Depends(get_db),
     request: VideoUrlRequest,
     current_user: User = Depends(get_current_user)
 ) -> VideoParseResponse:
@@ -266,7 +281,7 @@ async def parse_video_url(
     此接口仅解析URL，不进行文件下载或处理。
     """
     try:
-        processor = VideoProcessorService(db)
+        processor = VideoProcessorService()
         result = await processor.parse_video_url(request.url, current_user.id)
 
         if result["success"]:
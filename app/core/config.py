@@ -1,12 +1,18 @@
-import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
-from pydantic import PostgresDsn
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file=str(Path(__file__).parent.parent.parent / ".env"),
+        env_file_encoding="utf-8",
+        case_sensitive=True,
+        extra="ignore",  # .env 中多余的变量（如 docker-compose 专用项）不报错
+    )
+
     # 应用配置
     APP_NAME: str
     DEBUG: bool
@@ -39,14 +45,30 @@ class Settings(BaseSettings):
 
     # 视频处理配置
     FFMPEG_PATH: str = "ffmpeg"  # ffmpeg可执行文件路径
+    FFPROBE_PATH: str = "ffprobe"  # ffprobe可执行文件路径
+    USE_PYAV: bool = False  # 进程内用 PyAV 解码音频，省去每次启动 ffmpeg 子进程（需安装 av，失败时回退 ffmpeg）
+    KEEP_AUDIO_FILE: bool = True  # 是否保留提取出的音频文件（查询接口的 audio_path 依赖此文件；关闭后仅在内存中送识别）
+    VAD_ENABLED: bool = False  # 送识别前用 Silero-VAD 裁掉非语音片段（需安装 torch）
+    VAD_MODEL_PATH: str = "silero_vad.jit"  # Silero-VAD TorchScript 模型路径
+    BACKGROUND_WORKER_CONCURRENCY: int = 2  # 后台任务队列（视频处理/Telegram下载）并发数
     MEDIA_URL_PREFIX: str = "/downloads"  # 媒体文件访问前缀
+    PARSE_CACHE_TTL: int = 600  # 解析结果缓存秒数（0 关闭；Bot 返回的 CDN 链接有时效，不宜过长）
 
     # AI服务配置
-    AI_PROVIDER: str = "siliconflow"  # AI服务提供商：siliconflow, openai
+    AI_PROVIDER: str = "siliconflow"  # AI服务提供商：siliconflow, openai, faster_whisper
     SILICONFLOW_API_KEY: Optional[str] = None  # 硅基AI API密钥
     OPENAI_API_KEY: Optional[str] = None  # OpenAI API密钥
     AI_VOICE_MODEL: str = "FunAudioLLM/SenseVoiceSmall"  # 语音识别模型（硅基AI推荐）
     AI_SUMMARY_MODEL: str = "Qwen/QwQ-32B"  # 文本总结模型
+    SUMMARY_CHUNK_CHARS: int = 12000  # 字幕超过该字数时分段并发总结再汇总，避免超出模型上下文
+    SUMMARY_CONCURRENCY: int = 4  # 分段总结时同时在途的请求上限
+    ASR_CONCURRENCY: int = 8  # 同时在途的语音识别请求上限（本地 faster_whisper 固定为 1）
+
+    # 本地语音识别配置（AI_PROVIDER=faster_whisper 时生效）
+    WHISPER_MODEL: str = "large-v3-turbo"
+    WHISPER_DEVICE: str = "cuda"  # cuda, cpu
+    WHISPER_COMPUTE_TYPE: str = "int8_float16"  # CPU 上使用 int8
+    WHISPER_BATCH_SIZE: int = 16
     
     # Telegram 配置
     TG_API_ID: Optional[int] = None
@@ -58,39 +80,19 @@ class Settings(BaseSettings):
 
     @property
     def DATABASE_URL(self) -> str:
-        # 直接返回连接字符串，不使用 PostgresDsn
+        # 直接返回连接字符串
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
-    class Config:
-        env_file = str(Path(__file__).parent.parent.parent / ".env")
-        env_file_encoding = "utf-8"
-        case_sensitive = True
-
-        @classmethod
-        def customise_sources(
-            cls,
-            init_settings,
-            env_settings,
-            file_secret_settings,
-        ):
-            # 打印环境文件路径
-            env_file = str(Path(__file__).parent.parent.parent / ".env")
-            print(f"Looking for .env file at: {env_file}")
-            print(f"File exists: {Path(env_file).exists()}")
-
-            # 打印当前环境变量
-            print("Current environment variables:")
-            for key in [
-                    "POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DB",
-                    "POSTGRES_HOST", "POSTGRES_PORT"
-            ]:
-                print(f"{key}: {os.getenv(key)}")
-
-            return (
-                init_settings,
-                env_settings,
-                file_secret_settings,
-            )
-
-
-settings = Settings()
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        # 异步引擎使用 asyncpg 驱动
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """获取全局配置（进程内只解析一次 .env）"""
+    return Settings()
+
+
+settings = get_settings()
@@ -1,13 +1,15 @@
 from typing import Optional
 
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, Security, status
 from fastapi.security import HTTPAuthorizationCredentials
 from fastapi.security import HTTPBearer
 from fastapi.security import HTTPBearer as HTTPBearerSecurity
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.models.user import User
 
 
@@ -22,10 +24,14 @@ class HTTPBearer(HTTPBearerSecurity):
 
 security = HTTPBearer()
 
+# token -> 用户 ID 的进程内缓存，命中时不查询数据库。
+# 端点只使用 current_user.id；吊销或更换的 api_key 最多在 TTL 内仍然有效
+_TOKEN_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
 
 async def get_current_user(
         credentials: HTTPAuthorizationCredentials = Security(security),
-        db: Session = Depends(get_db)) -> User:
+        db: AsyncSession = Depends(get_async_db)) -> User:
     """
     从 Authorization header 中获取并验证 token
     格式: Authorization: Bearer <token>
@@ -38,13 +44,19 @@ async def get_current_user(
         )
 
     token = credentials.credentials
-    user = db.query(User).filter(User.api_key == token).first()
+    user_id = _TOKEN_CACHE.get(token)
+    if user_id is not None:
+        # 未关联会话的瞬态对象，只带 id 和 api_key
+        return User(id=user_id, api_key=token)
+
+    user = await db.scalar(select(User).where(User.api_key == token))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    _TOKEN_CACHE[token] = user.id
     return user
 
 
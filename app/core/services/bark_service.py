@@ -1,7 +1,14 @@
+import asyncio
+import logging
 from typing import Optional
+from urllib.parse import quote
 
 import aiohttp
 
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
 
 class BarkService:
 
@@ -17,6 +24,26 @@ class BarkService:
         """
         self.base_url = base_url.rstrip('/')
         self.default_device_key = default_device_key
+        self._session: Optional[aiohttp.ClientSession] = None
+        # 默认查询参数（level=timeSensitive, isArchive=1），每次调用在其基础上覆盖
+        self._base_params = {"level": "timeSensitive", "isArchive": "1"}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """懒加载共享的 HTTP 会话（keep-alive 复用连接）"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=50,
+                                               limit_per_host=20,
+                                               ttl_dns_cache=300,
+                                               keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=10))
+        return self._session
+
+    async def close(self):
+        """关闭共享的 HTTP 会话"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     async def send_notification(
         self,
@@ -27,7 +54,7 @@ class BarkService:
         sound: Optional[str] = None,
         icon: Optional[str] = None,
         group: Optional[str] = None,
-        url: Optional[str] = None,
+        click_url: Optional[str] = None,
         copy: Optional[str] = None,
         badge: Optional[int] = None,
         is_archive: bool = True,
@@ -43,7 +70,7 @@ class BarkService:
             sound: 提示音
             icon: 图标 URL
             group: 通知分组
-            url: 点击通知跳转的 URL
+            click_url: 点击通知跳转的 URL
             copy: 点击通知复制的文本
             badge: 角标数字
             is_archive: 是否归档
@@ -55,33 +82,34 @@ class BarkService:
         if not device_key:
             raise ValueError("device_key is required")
 
-        # 构建请求 URL
-        url = f"{self.base_url}/{device_key}/{title}/{content}"
+        # 构建请求 URL（标题/内容作为路径段，需完整转义 / ? # 等字符）
+        url = f"{self.base_url}/{device_key}/{quote(title, safe='')}/{quote(content, safe='')}"
 
         # 构建查询参数
-        params = {
-            "level": level,
-            "isArchive": "1" if is_archive else "0",
-        }
+        params = dict(self._base_params)
+        if level != "timeSensitive":
+            params["level"] = level
+        if not is_archive:
+            params["isArchive"] = "0"
         if sound:
             params["sound"] = sound
         if icon:
             params["icon"] = icon
         if group:
             params["group"] = group
-        if url:
-            params["url"] = url
+        if click_url:
+            params["url"] = click_url
         if copy:
             params["copy"] = copy
         if badge is not None:
             params["badge"] = str(badge)
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    return response.status == 200
-        except Exception as e:
-            print(f"Bark 通知发送失败: {str(e)}")
+            session = await self._get_session()
+            async with session.get(url, params=params) as response:
+                return response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            logger.warning("Bark 通知发送失败", exc_info=True)
             return False
 
     async def send_rest_notification(self,
@@ -171,3 +199,7 @@ class BarkService:
             level="timeSensitive",
             sound="bell",
             group="video_process")
+
+
+bark_service = BarkService(base_url=settings.BARK_BASE_URL,
+                           default_device_key=settings.BARK_DEFAULT_DEVICE_KEY)
@@ -1,11 +1,91 @@
-from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Union
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Union
 
-from notion_client import Client
+import httpx
+from aiolimiter import AsyncLimiter
+from notion_client import APIResponseError, AsyncClient
+from notion_client.errors import HTTPResponseError
+from tenacity import (AsyncRetrying, retry_if_exception, stop_after_attempt,
+                      wait_exponential_jitter)
 
+from app.core.config import settings
 from app.models.rest_record import RestRecord
 from app.schemas.rest_record import RestRecord as RestRecordSchema
 
+logger = logging.getLogger(__name__)
+
+# 东八区相对 UTC 的秒数（与 CN_TZ 一致的固定偏移）
+_CN_UTC_OFFSET = 8 * 3600
+
+
+class PageCreateResult(NamedTuple):
+    """创建 Notion 页面的结果：成功时带页面 ID，可重试错误耗尽重试后带错误信息"""
+    ok: bool
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """限流（429）、服务端错误（5xx）和网络错误可重试，其余 4xx 不重试"""
+    if isinstance(exc, HTTPResponseError):
+        return exc.status == 429 or exc.status >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+def _format_title(value: Any) -> Dict[str, Any]:
+    return {"title": [{"text": {"content": str(value)}}]}
+
+
+def _format_text(value: Any) -> Dict[str, Any]:
+    return {"rich_text": [{"text": {"content": str(value)}}]}
+
+
+def _format_number(value: Any) -> Dict[str, Any]:
+    return {"number": float(value) if value is not None else None}
+
+
+def _format_date(value: Any) -> Dict[str, Any]:
+    if isinstance(value, (int, float)):
+        # 如果是时间戳，转换为 ISO 格式
+        value = datetime.fromtimestamp(value).isoformat()
+    return {"date": {"start": value}}
+
+
+def _format_select(value: Any) -> Dict[str, Any]:
+    return {"select": {"name": str(value)}}
+
+
+# GTD 任务状态 -> Notion 选项名
+_GTD_STATUS = {
+    0: "待办",
+    1: "进行中",
+    2: "已完成",
+    3: "已取消",
+}
+
+# 休息记录的属性模板：(Notion 属性名, 格式化函数)，与 add_rest_record 中的取值按顺序对应
+_REST_RECORD_SCHEMA = (
+    ("月份", _format_title),
+    ("日期", _format_date),
+    ("城市", _format_text),
+    ("经度", _format_number),
+    ("纬度", _format_number),
+    ("记录时间", _format_date),
+    ("WiFi", _format_text),
+)
+
+# 属性类型 -> 格式化函数，一次字典查找代替逐个比较的 if/elif 链
+_PROPERTY_FORMATTERS = {
+    "title": _format_title,
+    "text": _format_text,
+    "number": _format_number,
+    "date": _format_date,
+    "select": _format_select,
+}
+
 
 class NotionService:
 
@@ -16,14 +96,24 @@ class NotionService:
         Args:
             token: Notion API token
         """
-        self.client = Client(auth=token)
+        # 异步客户端，复用同一个 httpx 连接池，避免每次请求重新握手
+        self.client = AsyncClient(auth=token,
+                                  client=httpx.AsyncClient(limits=httpx.Limits(
+                                      max_keepalive_connections=20)))
+        # Notion 平均限速约 3 次/秒：令牌桶限制为 2 次/秒，同时在途的写请求最多 2 个
+        self._limiter = AsyncLimiter(max_rate=2, time_period=1)
+        self._sem = asyncio.Semaphore(2)
+
+    async def close(self):
+        """关闭底层 HTTP 连接池"""
+        await self.client.aclose()
 
     async def create_page(
             self,
             database_id: str,
             properties: Dict[str, Any],
             title_property: Optional[str] = None,
-            title_content: Optional[str] = None) -> Optional[str]:
+            title_content: Optional[str] = None) -> PageCreateResult:
         """
         创建 Notion 页面
         
@@ -34,49 +124,81 @@ class NotionService:
             title_content: 标题内容，如果不提供则使用属性名
             
         Returns:
-            Notion 页面 ID，如果失败返回 None
+            创建结果，见 _send_page
         """
-        try:
-            # 构建页面数据
-            page_data = {
-                "parent": {
-                    "database_id": database_id
-                },
-                "properties": {}
-            }
+        page_properties = {}
 
-            # 处理属性
-            for prop_name, prop_data in properties.items():
-                if prop_name == title_property:
-                    # 处理标题属性
-                    page_data["properties"][prop_name] = {
-                        "title": [{
-                            "text": {
-                                "content": title_content or prop_name
-                            }
-                        }]
-                    }
-                else:
-                    # 处理其他属性
-                    page_data["properties"][prop_name] = self._format_property(
-                        prop_data)
-
-            # 如果没有指定标题属性，使用第一个属性作为标题
-            if not title_property and properties:
-                first_prop = next(iter(properties.items()))
-                page_data["properties"][first_prop[0]] = {
+        # 处理属性（不支持的类型属于调用方的编程错误，直接抛出 ValueError）
+        for prop_name, prop_data in properties.items():
+            if prop_name == title_property:
+                # 处理标题属性
+                page_properties[prop_name] = {
                     "title": [{
                         "text": {
-                            "content": title_content or first_prop[0]
+                            "content": title_content or prop_name
                         }
                     }]
                 }
+            else:
+                # 处理其他属性
+                page_properties[prop_name] = self._format_property(
+                    prop_data)
 
-            response = self.client.pages.create(**page_data)
-            return response.get('id')
-        except Exception as e:
-            print(f"Notion 数据同步失败: {str(e)}")
-            return None
+        # 如果没有指定标题属性，使用第一个属性作为标题
+        if not title_property and properties:
+            first_prop = next(iter(properties.items()))
+            page_properties[first_prop[0]] = {
+                "title": [{
+                    "text": {
+                        "content": title_content or first_prop[0]
+                    }
+                }]
+            }
+
+        return await self._send_page(database_id, page_properties)
+
+    async def _send_page(self, database_id: str,
+                         page_properties: Dict[str, Any]) -> PageCreateResult:
+        """
+        提交已是 Notion 接口格式的属性，创建页面
+
+        Args:
+            database_id: 数据库 ID
+            page_properties: Notion 接口格式的属性，格式为 {属性名: {类型: ...}}
+
+        Returns:
+            创建结果；限流/5xx/网络错误重试耗尽后 ok=False 并带错误信息
+
+        Raises:
+            APIResponseError: 不可重试的 4xx 错误，由调用方处理
+        """
+        page_data = {
+            "parent": {
+                "database_id": database_id
+            },
+            "properties": page_properties
+        }
+        try:
+            # 429/5xx/网络错误按指数退避（带抖动）重试
+            async for attempt in AsyncRetrying(
+                    stop=stop_after_attempt(5),
+                    wait=wait_exponential_jitter(initial=1, max=30),
+                    retry=retry_if_exception(_is_retryable),
+                    reraise=True):
+                with attempt:
+                    async with self._limiter, self._sem:
+                        response = await self.client.pages.create(**page_data)
+            return PageCreateResult(ok=True, id=response.get('id'))
+        except APIResponseError as e:
+            # 4xx（429 限流除外）是请求本身的问题，重试无意义，交由调用方处理
+            if 400 <= e.status < 500 and e.status != 429:
+                raise
+            logger.warning("Notion 数据同步失败", exc_info=True)
+            return PageCreateResult(ok=False, error=str(e))
+        except (HTTPResponseError, httpx.TransportError, asyncio.TimeoutError) as e:
+            # 只收敛可重试的运行时错误；KeyError 等编程错误直接抛出
+            logger.warning("Notion 数据同步失败", exc_info=True)
+            return PageCreateResult(ok=False, error=str(e) or type(e).__name__)
 
     def _format_property(self, prop_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -89,28 +211,15 @@ class NotionService:
             格式化后的属性数据
         """
         prop_type = prop_data.get("type")
-        value = prop_data.get("value")
-
-        if prop_type == "title":
-            return {"title": [{"text": {"content": str(value)}}]}
-        elif prop_type == "text":
-            return {"rich_text": [{"text": {"content": str(value)}}]}
-        elif prop_type == "number":
-            return {"number": float(value) if value is not None else None}
-        elif prop_type == "date":
-            if isinstance(value, (int, float)):
-                # 如果是时间戳，转换为 ISO 格式
-                value = datetime.fromtimestamp(value).isoformat()
-            return {"date": {"start": value}}
-        elif prop_type == "select":
-            return {"select": {"name": str(value)}}
-        else:
+        formatter = _PROPERTY_FORMATTERS.get(prop_type)
+        if formatter is None:
             raise ValueError(f"不支持的属性类型: {prop_type}")
+        return formatter(prop_data.get("value"))
 
     async def add_rest_record(
         self, database_id: str, record: Union[Dict[str, Any], RestRecord,
                                               RestRecordSchema]
-    ) -> Optional[str]:
+    ) -> PageCreateResult:
         """
         添加休息记录到 Notion 数据库
         
@@ -119,7 +228,7 @@ class NotionService:
             record: 休息记录数据，可以是字典、RestRecord 模型或 RestRecordSchema
             
         Returns:
-            Notion 页面 ID，如果失败返回 None
+            创建结果（PageCreateResult）
         """
         # 统一转换为字典格式
         if hasattr(record, "model_dump"):  # Pydantic v2
@@ -135,62 +244,35 @@ class NotionService:
 
         # 如果 record_dict 里没有 rest_time，则直接使用当前时间戳
         if "rest_time" not in record_dict:
-            record_dict["rest_time"] = int(datetime.now().timestamp())
+            record_dict["rest_time"] = int(time.time())
 
-        # rest_time = datetime.fromtimestamp(
-        #     record_dict["rest_time"]).isoformat()
-        # rest_date = datetime.fromtimestamp(
-        #     record_dict["rest_time"]).strftime("%Y-%m-%d")
+        # 东八区是固定偏移：UTC 时间加 8 小时后直接用 C 层的 time.strftime 生成 ISO 字符串，
+        # 不构造 datetime 对象；日期/月份由同一个 struct_time 拼接
+        st = time.gmtime(record_dict["rest_time"] + _CN_UTC_OFFSET)
+        rest_time = time.strftime("%Y-%m-%dT%H:%M:%S+08:00", st)
+        rest_date = f"{st.tm_year:04d}-{st.tm_mon:02d}-{st.tm_mday:02d}"
 
-        rest_time = datetime.fromtimestamp(
-            record_dict["rest_time"],
-            tz=timezone(timedelta(hours=8))).isoformat()
-        rest_date = datetime.fromtimestamp(
-            record_dict["rest_time"],
-            tz=timezone(timedelta(hours=8))).strftime("%Y-%m-%d")
-
-        # 构建属性数据（去掉 Notion 数据库中不存在的字段，比如"类型"）
+        # 按模板直接生成 Notion 接口格式的属性（去掉 Notion 数据库中不存在的字段，比如"类型"），
+        # 不再先构造 {type, value} 中间字典再逐个格式化。
+        # 标题：有 month_str 用 month_str，否则沿用原先以属性名"月份"作标题的行为
+        values = (
+            record_dict.get("month_str") or "月份",
+            rest_date,
+            record_dict.get("city") or "",
+            record_dict.get("longitude"),
+            record_dict.get("latitude"),
+            rest_time,
+            record_dict.get("wifi_name") or "",
+        )
         properties = {
-            "月份": {
-                "type":
-                "title",
-                "value":
-                record_dict.get("month_str") or datetime.fromtimestamp(
-                    record_dict["rest_time"]).strftime("%m月")
-            },
-            "日期": {
-                "type": "date",
-                "value": rest_date
-            },
-            "城市": {
-                "type": "text",
-                "value": record_dict.get("city") or ""
-            },
-            "经度": {
-                "type": "number",
-                "value": record_dict.get("longitude")
-            },
-            "纬度": {
-                "type": "number",
-                "value": record_dict.get("latitude")
-            },
-            "记录时间": {
-                "type": "date",
-                "value": rest_time
-            },
-            "WiFi": {
-                "type": "text",
-                "value": record_dict.get("wifi_name") or ""
-            }
+            name: formatter(value)
+            for (name, formatter), value in zip(_REST_RECORD_SCHEMA, values)
         }
 
-        return await self.create_page(
-            database_id=database_id,
-            properties=properties,
-            title_property=record_dict.get("month_str"))
+        return await self._send_page(database_id, properties)
 
     async def add_gtd_task(self, database_id: str,
-                           task: Dict[str, Any]) -> Optional[str]:
+                           task: Dict[str, Any]) -> PageCreateResult:
         """
         添加 GTD 任务到 Notion 数据库
         
@@ -199,11 +281,11 @@ class NotionService:
             task: 任务数据
             
         Returns:
-            Notion 页面 ID，如果失败返回 None
+            创建结果（PageCreateResult）
         """
-        # 转换时间戳为 ISO 格式
-        start_time = datetime.fromtimestamp(task['start_time']).isoformat()
-        end_time = datetime.fromtimestamp(task['end_time']).isoformat()
+        # 转换时间戳为 ISO 格式（本地时间，与 datetime.fromtimestamp().isoformat() 一致）
+        start_time = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(task['start_time']))
+        end_time = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(task['end_time']))
 
         # 构建属性数据
         properties = {
@@ -213,12 +295,7 @@ class NotionService:
             },
             "状态": {
                 "type": "select",
-                "value": {
-                    0: "待办",
-                    1: "进行中",
-                    2: "已完成",
-                    3: "已取消"
-                }[task['status']]
+                "value": _GTD_STATUS[task['status']]
             },
             "优先级": {
                 "type": "number",
@@ -241,4 +318,8 @@ class NotionService:
         return await self.create_page(
             database_id=database_id,
             properties=properties,
-            title_property=record_dict.get("month_str"))
+            title_property="名称",
+            title_content=task['name'])
+
+
+notion_service = NotionService(token=settings.NOTION_TOKEN)
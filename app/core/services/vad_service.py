@@ -0,0 +1,102 @@
+"""
+语音活动检测（VAD）服务
+使用 Silero-VAD 在送识别前裁掉静音、纯音乐等非语音片段
+"""
+
+import logging
+import threading
+from typing import List, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+_WINDOW_SIZE = 512  # Silero-VAD 在 16kHz 下的帧长（采样点）
+_SPEECH_THRESHOLD = 0.5
+_MIN_SILENCE_SAMPLES = SAMPLE_RATE // 10  # 静音超过 100ms 才切分片段
+_PAD_SAMPLES = SAMPLE_RATE // 10  # 拼接时片段之间补 100ms 静音
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def _get_model():
+    """懒加载 Silero-VAD 模型（进程内只加载一次）"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                # 可选依赖：仅在 VAD_ENABLED=true 时需要安装
+                import torch
+
+                _model = torch.jit.load(settings.VAD_MODEL_PATH)
+                _model.eval()
+    return _model
+
+
+def detect_speech(pcm) -> List[Tuple[int, int]]:
+    """
+    检测语音片段
+
+    Args:
+        pcm: 16kHz 单声道 int16 采样（numpy 数组）
+
+    Returns:
+        语音片段列表 [(起始采样点, 结束采样点)]
+    """
+    import torch
+
+    model = _get_model()
+    model.reset_states()
+    audio = torch.from_numpy(pcm.astype("float32") / 32768.0)
+
+    segments = []
+    start = None
+    silence = 0
+    with torch.no_grad():
+        for offset in range(0, len(audio) - _WINDOW_SIZE + 1, _WINDOW_SIZE):
+            prob = model(audio[offset:offset + _WINDOW_SIZE], SAMPLE_RATE).item()
+            if prob >= _SPEECH_THRESHOLD:
+                if start is None:
+                    start = offset
+                silence = 0
+            elif start is not None:
+                silence += _WINDOW_SIZE
+                if silence >= _MIN_SILENCE_SAMPLES:
+                    segments.append((start, offset + _WINDOW_SIZE - silence))
+                    start = None
+                    silence = 0
+    if start is not None:
+        segments.append((start, len(audio)))
+    return segments
+
+
+def trim_wav(wav: bytes) -> bytes:
+    """
+    裁掉 16kHz 单声道 PCM WAV 中的非语音部分，语音片段之间以短静音拼接
+    未检测到语音或解析失败时原样返回，交由识别服务处理
+    """
+    import numpy as np
+
+    idx = wav.find(b"data", 12)
+    if wav[:4] != b"RIFF" or idx == -1:
+        return wav
+    header = bytearray(wav[:idx + 8])
+    pcm = np.frombuffer(wav[idx + 8:], dtype="<i2")
+
+    segments = detect_speech(pcm)
+    if not segments:
+        return wav
+
+    pad = np.zeros(_PAD_SAMPLES, dtype="<i2")
+    pieces = []
+    for start, end in segments:
+        pieces.append(pcm[start:end])
+        pieces.append(pad)
+    trimmed = np.concatenate(pieces[:-1]).tobytes()
+
+    logger.info(f"VAD 裁剪音频: {len(pcm) / SAMPLE_RATE:.1f}s -> {len(trimmed) / 2 / SAMPLE_RATE:.1f}s")
+    header[4:8] = (len(header) + len(trimmed) - 8).to_bytes(4, "little")
+    header[idx + 4:idx + 8] = len(trimmed).to_bytes(4, "little")
+    return bytes(header) + trimmed
@@ -5,75 +5,192 @@
 """
 
 import asyncio
-import json
+import hashlib
+import io
 import logging
+import os
 import re
 import shutil
+import signal
+import uuid
+import wave
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from urllib.parse import urlsplit
+from typing import Optional, Dict, Any, List, Tuple
 
+import orjson
+from cachetools import LRUCache, TTLCache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.services.bark_service import BarkService
+from app.core.services import vad_service
+from app.core.services.bark_service import bark_service
 from app.utils.ai_client import get_ai_client
 from app.models.video_process_task import VideoProcessTask
 from app.services.telegram_service import telegram_service
 
 logger = logging.getLogger(__name__)
 
+_URL_RE = re.compile(r'https?://\S+')
+# 抖音作品ID（video/123…、note/123…、slides/123…，以及 modal_id=、aweme_id=、item_ids= 参数）
+_DOUYIN_ID_RE = re.compile(r"(?:video/|note/|slides/|modal_id=|aweme_id=|item_ids=)(\d{10,})")
+# 抖音分享短链：每次分享生成不同的短码，需解析跳转后才能得到作品ID
+_DOUYIN_SHORT_HOST = "v.douyin.com"
+# 推文ID（x.com/<user>/status/123…）
+_TWEET_ID_RE = re.compile(r"status(?:es)?/(\d+)")
+
+# 按视频流程处理的文件后缀（与 Telegram 按钮链接下载识别的后缀一致）
+_VIDEO_EXTS = frozenset({".mp4", ".mov", ".avi", ".mkv"})
+# 音轨可直接封装复制时使用的输出格式（ffprobe codec_name -> (ffmpeg -f, 后缀)），均可写入管道
+_COPY_AUDIO_FORMATS = {"aac": ("adts", ".aac"), "mp3": ("mp3", ".mp3")}
+# ffmpeg 标准输出管道的读缓冲，按 MB 级块读取减少系统调用
+_PIPE_BUFFER_SIZE = 1 << 20
+# 解析结果缓存 去重键 -> 结果，同一内容在有效期内不再与 Bot 对话
+_PARSE_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=max(settings.PARSE_CACHE_TTL, 1))
+# 按内容哈希缓存识别和总结结果（失败重提、重复转发时不再调用模型），只缓存成功结果
+_ASR_CACHE: LRUCache = LRUCache(maxsize=256)  # sha256(音频) -> 字幕
+_SUMMARY_CACHE: LRUCache = LRUCache(maxsize=256)  # sha256(字幕) -> 总结
+# 同时进行的音频提取（ffmpeg/PyAV）上限（进程内共享）：每路单线程，总共占用约一半 CPU 核
+_FFMPEG_SEM = asyncio.Semaphore(max(1, (os.cpu_count() or 2) // 2))
+
+
+@lru_cache(maxsize=None)
+def _which(executable: str) -> Optional[str]:
+    """缓存可执行文件查找结果，避免每次提取都扫描 PATH"""
+    return shutil.which(executable)
+
+
+def _fix_wav_sizes(data: bytearray):
+    """
+    修正管道输出的 WAV 头长度字段
+    ffmpeg 写入不可回溯的管道时无法回填 RIFF/data 块长度，这里按实际数据长度补齐
+    """
+    if data[:4] != b"RIFF":
+        return
+    data[4:8] = (len(data) - 8).to_bytes(4, "little")
+    idx = data.find(b"data", 12)
+    if idx != -1:
+        data[idx + 4:idx + 8] = (len(data) - idx - 8).to_bytes(4, "little")
+
+
+def _decode_audio_pyav(video_path: Path) -> bytes:
+    """
+    进程内用 PyAV（libav）解码首条音轨并重采样为 16kHz 单声道 PCM WAV
+    在线程中调用；libav 解码期间释放 GIL，不阻塞其他任务
+    """
+    # 可选依赖：仅在 USE_PYAV=true 时需要安装
+    import av
+
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=16000)
+    pcm = bytearray()
+    with av.open(str(video_path)) as container:
+        for frame in container.decode(audio=0):
+            for resampled in resampler.resample(frame):
+                pcm += resampled.to_ndarray().tobytes()
+    for resampled in resampler.resample(None):
+        pcm += resampled.to_ndarray().tobytes()
+    if not pcm:
+        raise ValueError("未解码出音频数据")
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
 
 class VideoProcessorService:
     """视频处理服务"""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Optional[Session] = None):
         """
         初始化视频处理服务
 
         Args:
-            db: 数据库会话
+            db: 数据库会话（后台处理流程使用；仅解析/查重时可不传）
         """
         self.db = db
-        self.bark_service = BarkService(
-            base_url=getattr(settings, 'BARK_BASE_URL', 'https://api.day.app'),
-            default_device_key=getattr(settings, 'BARK_DEFAULT_DEVICE_KEY', None)
-        )
+        self.bark_service = bark_service
         self.temp_dir = Path(settings.TG_DOWNLOAD_PATH)
         self.temp_dir.mkdir(parents=True, exist_ok=True)
-        self.ffmpeg_path = settings.FFMPEG_PATH
+        # 解析为绝对路径（进程内只查找一次），启动子进程时不再沿 PATH 逐个目录尝试
+        self.ffmpeg_path = _which(settings.FFMPEG_PATH) or settings.FFMPEG_PATH
+        self.ffprobe_path = _which(settings.FFPROBE_PATH) or settings.FFPROBE_PATH
         self.telegram_service = telegram_service
 
     def extract_video_url(self, text: str) -> Optional[str]:
         """从文本中提取视频URL"""
-        url_pattern = r'https?://[^\s]+'
-        match = re.search(url_pattern, text)
+        match = _URL_RE.search(text)
         if match:
-            actual_url = match.group()
-            logger.info(f"提取到URL: {actual_url}")
-            return actual_url
-        else:
-            logger.error(f"无法从文本提取视频URL: {text}")
-            return None
+            # 查重、解析路径都会调用，成功分支只在 DEBUG 级别记录，由 logging 延迟格式化
+            logger.debug("提取到URL: %s", match.group())
+            return match.group()
+        logger.error(f"无法从文本提取视频URL: {text}")
+        return None
 
     async def process_video(self, task_id: str, video_url: str) -> Dict[str, Any]:
         """处理视频的完整流程"""
-        task = self.db.query(VideoProcessTask).filter(
-            VideoProcessTask.id == task_id
-        ).first()
+        # 创建接口不发网络请求，抖音短链在后台解析为作品ID后再查重；
+        # 跳转解析在读取任务之前完成，HEAD 请求期间不占用数据库连接
+        video_key = await self.resolve_video_key(video_url)
+
+        # 主键查询走 identity map，已加载时无需再发 SELECT
+        task = await asyncio.to_thread(self.db.get, VideoProcessTask, uuid.UUID(str(task_id)))
 
         if not task:
             raise ValueError(f"任务不存在: {task_id}")
 
         try:
+            if task.douyin_id and task.douyin_id.startswith(_DOUYIN_SHORT_HOST):
+                task.douyin_id = video_key
+
+            # 排队期间同一内容的另一任务可能已处理完成（创建接口的查重挡不住并发提交）：
+            # 直接复用其结果，跳过下载、提取、识别和总结
+            existing = await asyncio.to_thread(self._find_completed_duplicate, task)
+            if existing:
+                logger.info(f"[Task {task_id}] 复用已完成任务 {existing.id} 的结果")
+                task.media_type = existing.media_type
+                task.video_path = existing.video_path
+                task.audio_path = existing.audio_path
+                task.download_urls = existing.download_urls
+                task.subtitle_text = existing.subtitle_text
+                task.ai_summary = existing.ai_summary
+                task.status = VideoProcessTask.STATUS_COMPLETED
+                await self._commit()
+                try:
+                    await self.bark_service.send_video_process_complete_notification(
+                        device_key=self.bark_service.default_device_key,
+                        task_id=task_id,
+                        video_summary=existing.ai_summary
+                    )
+                except Exception as bark_err:
+                    logger.error(f"Bark通知发送失败: {bark_err}")
+                return {
+                    "success": True,
+                    "task_id": task_id,
+                    "video_path": existing.video_path,
+                    "audio_path": existing.audio_path,
+                    "subtitle_text": existing.subtitle_text,
+                    "ai_summary": existing.ai_summary
+                }
+
             # 更新状态为处理中
             task.status = VideoProcessTask.STATUS_PROCESSING
-            self.db.commit()
+            await self._commit()
 
             # 1. 下载内容 (优先使用 Telegram)
             logger.info(f"开始下载内容: {video_url}")
             
-            # 使用 TelegramService 统一处理下载
-            downloaded_files = await self.telegram_service.get_and_download_video(video_url)
+            # 使用 TelegramService 统一处理下载，文件落在任务独立目录，清理时整体删除
+            task_dir = self._task_dir(task_id)
+            await asyncio.to_thread(task_dir.mkdir, parents=True, exist_ok=True)
+            downloaded_files = await self.telegram_service.get_and_download_video(
+                video_url, download_dir=str(task_dir))
             
             if not downloaded_files:
                 raise Exception("内容下载失败: Telegram 返回空")
@@ -81,45 +198,50 @@ class VideoProcessorService:
             logger.info(f"下载成功，共 {len(downloaded_files)} 个文件")
             
             # 逻辑分支：检查是否包含视频
-            video_files = [f for f in downloaded_files if f.lower().endswith('.mp4')]
+            video_files = [f for f in downloaded_files if os.path.splitext(f)[1].lower() in _VIDEO_EXTS]
             
             if video_files:
                 # 情况 1: 有视频，取第一个进行后续处理
                 video_path = Path(video_files[0])
                 logger.info(f"识别到视频文件，准备进入全流程: {video_path}")
+                # 中间结果只写到对象上，随最终状态一次提交：
+                # 查询接口仅在完成后才返回这些字段，失败分支同样会提交已有进度
                 task.video_path = str(video_path)
                 task.media_type = "video"
                 task.original_url = video_url
-                self.db.commit()
-                
+
                 # 继续后续流程
                 # 2. 提取音频
                 logger.info("开始提取音频")
-                audio_path = await self._extract_audio(video_path)
-                if not audio_path or not audio_path.exists():
+                audio = await self._extract_audio(video_path)
+                if not audio:
                     raise Exception("音频提取失败")
-                task.audio_path = str(audio_path)
-                self.db.commit()
+                audio_data, audio_name = audio
+                if settings.VAD_ENABLED and audio_name.endswith(".wav"):
+                    audio_data = await self._trim_silence(audio_data)
+                audio_path = None
+                if settings.KEEP_AUDIO_FILE:
+                    audio_path = task_dir / audio_name
+                    await asyncio.to_thread(audio_path.write_bytes, audio_data)
+                    task.audio_path = str(audio_path)
 
                 # 3. 语音识别
                 logger.info("开始语音识别")
-                subtitle_text = await self._recognize_speech(audio_path)
+                subtitle_text = await self._recognize_speech(audio_data, audio_name)
                 if not subtitle_text:
                     raise Exception("语音识别失败")
                 task.subtitle_text = subtitle_text
-                self.db.commit()
 
                 # 4. AI总结
                 logger.info("开始AI总结")
-                ai_summary = await self._generate_summary(subtitle_text)
+                ai_summary = await self._generate_summary(subtitle_text, task)
                 if not ai_summary:
                     raise Exception("AI总结失败")
                 task.ai_summary = ai_summary
-                self.db.commit()
 
                 # 5. 更新为完成
                 task.status = VideoProcessTask.STATUS_COMPLETED
-                self.db.commit()
+                await self._commit()
 
                 # 发送 Bark 通知
                 try:
@@ -135,7 +257,7 @@ class VideoProcessorService:
                     "success": True,
                     "task_id": task_id,
                     "video_path": str(video_path),
-                    "audio_path": str(audio_path),
+                    "audio_path": str(audio_path) if audio_path else None,
                     "subtitle_text": subtitle_text,
                     "ai_summary": ai_summary
                 }
@@ -144,9 +266,9 @@ class VideoProcessorService:
                 logger.info("未识别到视频文件，仅包含图片。流程结束。")
                 task.video_path = str(downloaded_files[0])
                 task.media_type = "image"
-                task.download_urls = json.dumps(downloaded_files)
+                task.download_urls = orjson.dumps(downloaded_files).decode()
                 task.status = VideoProcessTask.STATUS_COMPLETED
-                self.db.commit()
+                await self._commit()
                 
                 # 发送图片完成通知
                 try:
@@ -171,7 +293,9 @@ class VideoProcessorService:
             if task:
                 task.status = VideoProcessTask.STATUS_FAILED
                 task.error_message = str(e)
-                self.db.commit()
+                # 总结中途失败时清除已流式写入的部分总结
+                task.ai_summary = None
+                await self._commit()
                 try:
                     await self.bark_service.send_notification(
                         title="任务处理失败",
@@ -181,34 +305,125 @@ class VideoProcessorService:
                 except: pass
             return {"success": False, "task_id": task_id, "error": str(e)}
 
-    async def _extract_audio(self, video_path: Path) -> Optional[Path]:
-        """使用ffmpeg提取音频"""
+    async def _probe_audio_codec(self, video_path: Path) -> Optional[str]:
+        """使用ffprobe读取首条音轨的编码格式"""
         try:
-            if not shutil.which(self.ffmpeg_path):
-                raise Exception(f"ffmpeg未找到: {self.ffmpeg_path}")
-            audio_path = self.temp_dir / f"{video_path.stem}.mp3"
-            cmd = [self.ffmpeg_path, "-i", str(video_path), "-vn", "-acodec", "mp3", "-ab", "192k", "-y", str(audio_path)]
-            process = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
-            await process.communicate()
-            return audio_path if audio_path.exists() else None
+            cmd = [self.ffprobe_path, "-v", "error", "-select_streams", "a:0",
+                   "-show_entries", "stream=codec_name", "-of", "json", str(video_path)]
+            # 只需要 stdout 中的 JSON，stderr 不建管道
+            process = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+            stdout, _ = await process.communicate()
+            if process.returncode != 0:
+                return None
+            streams = orjson.loads(stdout or b"{}").get("streams") or []
+            return streams[0].get("codec_name") if streams else None
+        except Exception as e:
+            logger.warning(f"ffprobe探测音轨失败，回退为转码: {e}")
+            return None
+
+    async def _extract_audio(self, video_path: Path) -> Optional[Tuple[bytes, str]]:
+        """
+        使用ffmpeg提取音频，输出经管道直接读入内存，不落盘中间文件（USE_PYAV 时优先进程内解码）
+        识别服务可接受原始编码时只做封装复制（失败则回退转码），否则转为16kHz单声道WAV
+
+        Returns:
+            (音频数据, 文件名)，失败返回 None
+        """
+        try:
+            if settings.USE_PYAV:
+                try:
+                    async with _FFMPEG_SEM:
+                        data = await asyncio.to_thread(_decode_audio_pyav, video_path)
+                    return data, f"{video_path.stem}.wav"
+                except Exception as e:
+                    logger.warning(f"PyAV 提取音频失败，回退为 ffmpeg: {e}")
+            codec = await self._probe_audio_codec(video_path)
+            # 启用 VAD 时统一输出 PCM WAV，便于按采样点裁剪
+            if codec in get_ai_client().accepted_audio_codecs and not settings.VAD_ENABLED:
+                fmt, suffix = _COPY_AUDIO_FORMATS[codec]
+                try:
+                    data = await self._run_ffmpeg(video_path, ["-c:a", "copy", "-f", fmt])
+                    return data, f"{video_path.stem}{suffix}"
+                except Exception as e:
+                    logger.warning(f"音轨封装复制失败，回退为转码: {e}")
+            data = bytearray(await self._run_ffmpeg(
+                video_path, ["-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le", "-f", "wav"]))
+            _fix_wav_sizes(data)
+            return bytes(data), f"{video_path.stem}.wav"
         except Exception as e:
             logger.error(f"音频提取失败: {e}")
             return None
 
-    async def _recognize_speech(self, audio_path: Path) -> Optional[str]:
-        """语音识别"""
+    async def _run_ffmpeg(self, video_path: Path, codec_args: List[str]) -> bytes:
+        """执行 ffmpeg 提取音轨并返回标准输出中的音频数据"""
+        cmd = [self.ffmpeg_path, "-hide_banner", "-nostdin", "-nostats", "-loglevel", "error", "-threads", "1",
+               "-i", str(video_path), "-vn", *codec_args, "pipe:1"]
+        async with _FFMPEG_SEM:
+            # 独立进程组：任务被取消或出错时整组结束，不留下孤儿 ffmpeg 占用 CPU
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=_PIPE_BUFFER_SIZE,
+                start_new_session=True
+            )
+            try:
+                stdout, stderr = await process.communicate()
+            except BaseException:
+                if process.returncode is None:
+                    try:
+                        os.killpg(process.pid, signal.SIGTERM)
+                    except ProcessLookupError:
+                        pass
+                    await process.wait()
+                raise
+        if process.returncode != 0 or not stdout:
+            raise Exception(stderr.decode(errors="ignore").strip() or f"ffmpeg退出码 {process.returncode}")
+        return stdout
+
+    async def _trim_silence(self, wav: bytes) -> bytes:
+        """VAD 裁掉非语音片段（在线程池中推理；失败时原样返回）"""
         try:
+            return await asyncio.to_thread(vad_service.trim_wav, wav)
+        except Exception as e:
+            logger.warning(f"VAD 处理失败，使用原始音频: {e}")
+            return wav
+
+    async def _recognize_speech(self, audio_data: bytes, filename: str) -> Optional[str]:
+        """语音识别（相同音频命中缓存时直接返回）"""
+        try:
+            # 音频可达数十 MB，哈希放到线程中计算
+            key = (await asyncio.to_thread(hashlib.sha256, audio_data)).digest()
+            cached = _ASR_CACHE.get(key)
+            if cached:
+                logger.info("语音识别命中缓存")
+                return cached
             ai_client = get_ai_client()
-            return await ai_client.recognize_speech(audio_path)
+            text = await ai_client.recognize_speech(audio_data, filename)
+            if text:
+                _ASR_CACHE[key] = text
+            return text
         except Exception as e:
             logger.error(f"语音识别失败: {e}")
             return None
 
-    async def _generate_summary(self, text: str) -> Optional[str]:
-        """AI总结"""
+    async def _generate_summary(self, text: str, task: Optional[VideoProcessTask] = None) -> Optional[str]:
+        """AI总结（流式生成，传入 task 时定期落库已生成部分，查询接口可看到进度）"""
+        async def save_progress(partial: str):
+            task.ai_summary = partial
+            await self._commit()
+
         try:
+            key = hashlib.sha256(text.encode()).digest()
+            cached = _SUMMARY_CACHE.get(key)
+            if cached:
+                logger.info("AI总结命中缓存")
+                return cached
             ai_client = get_ai_client()
-            return await ai_client.summarize_text(text)
+            summary = await ai_client.summarize_long_text(text, on_progress=save_progress if task else None)
+            if summary:
+                _SUMMARY_CACHE[key] = summary
+            return summary
         except Exception as e:
             logger.error(f"AI总结失败: {e}")
             return None
@@ -220,6 +435,13 @@ class VideoProcessorService:
             if not actual_url:
                 return {"success": False, "error": "无法提取URL"}
 
+            # 同一内容的不同链接形式共用缓存（键与任务去重一致）
+            cache_key = self.get_video_key(actual_url)
+            cached = _PARSE_CACHE.get(cache_key)
+            if cached:
+                logger.info(f"解析结果命中缓存: {cache_key}")
+                return cached
+
             # 简单的路由逻辑
             target_bot = self.telegram_service.douyin_bot
             if "x.com" in actual_url.lower() or "twitter.com" in actual_url.lower():
@@ -243,28 +465,89 @@ class VideoProcessorService:
                     local_url = f"{prefix}/{filename}"
                     download_urls.append(local_url)
             
-            return {
+            result = {
                 "success": True,
                 "download_urls": download_urls,
                 "buttons": urls # 返回原始按钮文本和链接的映射
             }
+            # 只缓存成功结果
+            if settings.PARSE_CACHE_TTL > 0 and download_urls:
+                _PARSE_CACHE[cache_key] = result
+            return result
         except Exception as e:
             logger.error(f"解析URL失败: {e}")
             return {"success": False, "error": str(e)}
 
+    def _task_dir(self, task_id: str) -> Path:
+        """任务独立的临时文件目录"""
+        return self.temp_dir / str(task_id)
+
     async def cleanup_temp_files(self, task_id: str):
-        """清理临时文件"""
+        """清理临时文件（整体删除任务目录，无需扫描共享目录）"""
         try:
-            for file_path in self.temp_dir.glob(f"{task_id}_*"):
-                if file_path.is_file(): file_path.unlink()
+            await asyncio.to_thread(shutil.rmtree, self._task_dir(task_id), ignore_errors=True)
         except Exception as e:
             logger.error(f"清理临时文件失败: {e}")
 
-    def check_existing_task(self, video_url: str) -> Optional[VideoProcessTask]:
-        """检查是否已存在处理记录"""
+    def get_video_key(self, video_url: str) -> Optional[str]:
+        """
+        从分享文本计算视频去重键（存入 douyin_id 列）
+        同一内容的不同链接形式（带分享参数、长/短链）映射到同一个键：
+        抖音取作品ID，推特取 x:推文ID，其余取去掉查询参数的规范化URL
+        """
         actual_url = self.extract_video_url(video_url)
         if not actual_url: return None
-        return self.db.query(VideoProcessTask).filter(
-            VideoProcessTask.original_url == actual_url,
-            VideoProcessTask.status == VideoProcessTask.STATUS_COMPLETED
-        ).first()
+        parts = urlsplit(actual_url)
+        host = parts.netloc.lower()
+        if host.endswith(("x.com", "twitter.com")):
+            match = _TWEET_ID_RE.search(parts.path)
+            if match:
+                return f"x:{match.group(1)}"
+        else:
+            match = _DOUYIN_ID_RE.search(actual_url)
+            if match:
+                return match.group(1)
+        return f"{host}{parts.path.rstrip('/')}"
+
+    async def _commit(self):
+        """
+        提交当前事务
+        后台会话是同步驱动，提交放到线程中执行，避免网络往返和 WAL 刷盘阻塞事件循环；
+        同一任务内的数据库操作都是顺序 await 的，会话不会被并发访问
+        """
+        await asyncio.to_thread(self.db.commit)
+
+    def _find_completed_duplicate(self, task: VideoProcessTask) -> Optional[VideoProcessTask]:
+        """查找同一去重键下其他已完成的任务（后台会话同步查询，走 douyin_id + status 索引）"""
+        if not task.douyin_id:
+            return None
+        return self.db.scalar(
+            select(VideoProcessTask).where(
+                VideoProcessTask.douyin_id == task.douyin_id,
+                VideoProcessTask.status == VideoProcessTask.STATUS_COMPLETED,
+                VideoProcessTask.id != task.id
+            ).limit(1)
+        )
+
+    async def resolve_video_key(self, video_url: str) -> Optional[str]:
+        """
+        计算去重键；抖音短链先解析一次跳转，换成作品ID（需网络请求，仅在后台任务中调用）
+        同一视频的多次分享短码各不相同，不解析的话彼此永远无法命中去重；解析失败时退回短链键
+        """
+        video_key = self.get_video_key(video_url)
+        if video_key and video_key.startswith(_DOUYIN_SHORT_HOST):
+            location = await self.telegram_service.resolve_redirect(self.extract_video_url(video_url))
+            if location:
+                match = _DOUYIN_ID_RE.search(location)
+                if match:
+                    return match.group(1)
+        return video_key
+
+    async def check_existing_task(self, db: AsyncSession, video_key: str) -> Optional[VideoProcessTask]:
+        """按去重键检查是否已存在处理完成的记录（走 douyin_id 索引）"""
+        return await db.scalar(
+            select(VideoProcessTask).where(
+                VideoProcessTask.douyin_id == video_key,
+                VideoProcessTask.status == VideoProcessTask.STATUS_COMPLETED
+            ).limit(1)
+        )
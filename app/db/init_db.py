@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 
 from app.db.base_class import Base
 from app.db.session import engine
+from app.models.failed_notion_sync import FailedNotionSync
 from app.models.rest_record import RestRecord
 from app.models.user import User
 
@@ -0,0 +1,49 @@
+"""
+开发环境 SQL 查询计数
+按请求统计执行的 SQL 语句数，超过阈值时告警，用于发现隐藏的 N+1 查询
+"""
+
+import logging
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event
+from starlette.middleware.base import BaseHTTPMiddleware
+
+logger = logging.getLogger("nplusone")
+
+# 当前请求的查询计数器（使用可变列表，以便在子任务/线程池中共享）
+_query_count: ContextVar[Optional[List[int]]] = ContextVar("query_count",
+                                                           default=None)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def install_query_counter(*engines):
+    """为同步引擎注册查询计数监听（异步引擎传入 async_engine.sync_engine）"""
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _count_query)
+
+
+class QueryCountMiddleware(BaseHTTPMiddleware):
+    """请求内 SQL 语句数超过阈值时输出告警"""
+
+    def __init__(self, app, threshold: int = 10):
+        super().__init__(app)
+        self.threshold = threshold
+
+    async def dispatch(self, request, call_next):
+        counter = [0]
+        token = _query_count.set(counter)
+        try:
+            return await call_next(request)
+        finally:
+            _query_count.reset(token)
+            if counter[0] > self.threshold:
+                logger.warning(
+                    f"{request.method} {request.url.path} 执行了 {counter[0]} 条 SQL，"
+                    f"可能存在 N+1 查询")
@@ -1,11 +1,31 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
-engine = create_engine(str(settings.DATABASE_URL))
+# 连接池：不做 pre_ping（省去每次签出的 SELECT 1 往返），依靠 pool_recycle 定期淘汰旧连接
+engine = create_engine(str(settings.DATABASE_URL),
+                       pool_size=20,
+                       max_overflow=40,
+                       pool_pre_ping=False,
+                       pool_recycle=1800)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步引擎：供 async 端点使用，避免同步 DB 调用阻塞事件循环
+# asyncpg 默认缓存预编译语句；关闭 JIT，避免小查询付出计划编译开销
+async_engine = create_async_engine(settings.ASYNC_DATABASE_URL,
+                                   pool_size=20,
+                                   max_overflow=40,
+                                   pool_pre_ping=False,
+                                   pool_recycle=1800,
+                                   insertmanyvalues_page_size=1000,
+                                   connect_args={"server_settings": {"jit": "off"}})
+# expire_on_commit=False：commit 后 ORM 对象仍可直接用于响应序列化
+AsyncSessionLocal = async_sessionmaker(async_engine,
+                                       autoflush=False,
+                                       expire_on_commit=False)
+
 
 def get_db():
     db = SessionLocal()
@@ -13,3 +33,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -1,14 +1,22 @@
 from contextlib import asynccontextmanager
 import logging
 import os
+import shutil
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.v1.endpoints import gtd, rest_records, video_process, telegram
 from app.core.config import settings
+from app.core.services.bark_service import bark_service
+from app.core.services.notion_service import notion_service
 from app.db.init_db import init_db
+from app.db.query_counter import QueryCountMiddleware, install_query_counter
+from app.db.session import async_engine, engine
 from app.services.telegram_service import telegram_service
+from app.utils.ai_client import close_ai_client
+from app.workers.video_worker import job_queue
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.staticfiles import StaticFiles
 
@@ -23,6 +31,7 @@ def setup_logging():
     # 设置第三方库的日志级别，减少干扰
     logging.getLogger('uvicorn.access').setLevel(logging.WARNING)
     logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
+    logging.getLogger('nplusone').setLevel(logging.WARNING)
 
 
 @asynccontextmanager
@@ -36,10 +45,19 @@ async def lifespan(app: FastAPI):
         await telegram_service.start()
     else:
         logging.info("Telegram service is disabled by configuration.")
+    # ffmpeg 只在启动时检查一次，缺失时视频处理会在提取音频阶段失败
+    if not shutil.which(settings.FFMPEG_PATH):
+        logging.warning(f"ffmpeg not found: {settings.FFMPEG_PATH}, video processing will fail at audio extraction.")
+    # 启动后台任务队列消费者
+    job_queue.start()
     yield
     # 关闭时的清理工作
+    await job_queue.stop()
     if settings.ENABLE_TG_SERVICE:
         await telegram_service.stop()
+    await notion_service.close()
+    await bark_service.close()
+    await close_ai_client()
 
 
 app = FastAPI(
@@ -50,6 +68,7 @@ app = FastAPI(
     openapi_url="/api/v1/openapi.json",
     lifespan=lifespan,
     docs_url=None,  # 禁用默认 docs_url 以便手动重构
+    default_response_class=ORJSONResponse,  # orjson 序列化响应，原生支持 datetime/UUID
 )
 
 # 覆盖默认的 Swagger UI 路由，使用更稳定的 CDN
@@ -87,6 +106,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 开发环境：统计每个请求的 SQL 条数，及早发现隐藏的 N+1 查询
+if settings.DEBUG:
+    install_query_counter(engine, async_engine.sync_engine)
+    app.add_middleware(QueryCountMiddleware)
+
 # 挂载下载文件的静态目录
 if not os.path.exists(settings.TG_DOWNLOAD_PATH):
     os.makedirs(settings.TG_DOWNLOAD_PATH)
@@ -0,0 +1,24 @@
+import time
+
+from sqlalchemy import BigInteger, Column, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base_class import Base
+from app.utils.uuid7 import uuid7
+
+
+class FailedNotionSync(Base):
+    """Notion 同步失败记录，便于事后补偿，而不只依赖 Bark 告警"""
+
+    __tablename__ = "failed_notion_sync"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    user_id = Column(String, nullable=False, index=True, comment="用户ID")
+    record_id = Column(UUID(as_uuid=True),
+                       nullable=False,
+                       comment="同步失败的休息记录ID")
+    database_id = Column(String, nullable=True, comment="Notion 数据库ID")
+    error_message = Column(Text, nullable=True, comment="错误信息")
+    created_at = Column(BigInteger,
+                        default=lambda: int(time.time()),
+                        nullable=False)
@@ -1,22 +1,25 @@
-import uuid
-from datetime import datetime
+import time
 
 from sqlalchemy import BigInteger, Column, ForeignKey, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.db.base_class import Base
+from app.utils.uuid7 import uuid7
 
 
 class GtdTask(Base):
     __tablename__ = "gtd_tasks"
 
+    # 插入时通过 RETURNING 回填默认值，commit 后无需再 refresh
+    __mapper_args__ = {"eager_defaults": True}
+
     # 任务状态常量
     STATUS_TODO = 0
     STATUS_DOING = 1
     STATUS_DONE = 2
     STATUS_CANCELLED = 3
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column(String,
                      ForeignKey("users.id"),
                      nullable=False,
@@ -35,9 +38,9 @@ class GtdTask(Base):
                     default=STATUS_TODO,
                     comment="任务状态：0-待办，1-进行中，2-已完成，3-已取消")
     created_at = Column(BigInteger,
-                        default=lambda: int(datetime.utcnow().timestamp()),
+                        default=lambda: int(time.time()),
                         nullable=False)
     updated_at = Column(BigInteger,
-                        default=lambda: int(datetime.utcnow().timestamp()),
-                        onupdate=lambda: int(datetime.utcnow().timestamp()),
+                        default=lambda: int(time.time()),
+                        onupdate=lambda: int(time.time()),
                         nullable=False)
@@ -1,36 +1,43 @@
-import uuid
-from datetime import datetime
+import time
 
-from sqlalchemy import BigInteger, Column, Float, ForeignKey, Integer, String
+from sqlalchemy import (BigInteger, Column, Float, ForeignKey, Index, Integer,
+                        String)
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.db.base_class import Base
+from app.utils.uuid7 import uuid7
 
 
 class RestRecord(Base):
     __tablename__ = "rest_records"
+    # 插入时通过 RETURNING 回填默认值，commit 后无需再 refresh
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # 支撑按用户 + 时间区间的范围查询（年度统计）
+        Index("ix_rest_records_user_time", "user_id", "rest_time"),
+    )
 
     # 休息类型常量
     REST_TYPE_SLEEP = 0
     REST_TYPE_WAKE_UP = 1
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     rest_type = Column(Integer, nullable=False)  # 0: SLEEP, 1: WAKE_UP
     rest_time = Column(BigInteger,
                        nullable=False,
-                       default=lambda: int(datetime.now().timestamp()))
+                       default=lambda: int(time.time()))
     month_str = Column(String,
                        nullable=False,
-                       default=lambda: datetime.now().strftime('%m月'))
+                       default=lambda: time.strftime('%m月'))
     wifi_name = Column(String, nullable=True)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
     city = Column(String, nullable=True)
     created_at = Column(BigInteger,
-                        default=lambda: int(datetime.utcnow().timestamp()),
+                        default=lambda: int(time.time()),
                         nullable=False)
     updated_at = Column(BigInteger,
-                        default=lambda: int(datetime.utcnow().timestamp()),
-                        onupdate=lambda: int(datetime.utcnow().timestamp()),
+                        default=lambda: int(time.time()),
+                        onupdate=lambda: int(time.time()),
                         nullable=False)
@@ -2,17 +2,21 @@
 视频处理任务数据库模型
 """
 
-import uuid
-from datetime import datetime
-from sqlalchemy import Column, String, Text, BigInteger
+import time
+from sqlalchemy import Column, String, Text, BigInteger, Index
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base_class import Base
+from app.utils.uuid7 import uuid7
 
 
 class VideoProcessTask(Base):
     """视频处理任务模型"""
 
     __tablename__ = "video_process_tasks"
+    __table_args__ = (
+        # 去重查询按 douyin_id + status 等值过滤，复合索引一次探查即可命中
+        Index("ix_video_process_tasks_key_status", "douyin_id", "status"),
+    )
 
     # 任务类型常量
     TASK_TYPE_PARSE = "parse"  # 仅解析URL，不处理
@@ -25,7 +29,7 @@ class VideoProcessTask(Base):
     STATUS_FAILED = "failed"
     STATUS_PARSED = "parsed"  # 仅解析完成
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, comment="任务ID")
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, comment="任务ID")
     user_id = Column(String, nullable=False, index=True, comment="用户ID")
     task_type = Column(
         String,
@@ -36,7 +40,8 @@ class VideoProcessTask(Base):
     )
 
     # 视频信息
-    douyin_id = Column(String, nullable=True, index=True, comment="抖音视频ID（去重用）")
+    # 不单独建索引：ix_video_process_tasks_key_status 的前缀列即可覆盖按 douyin_id 的查询
+    douyin_id = Column(String, nullable=True, comment="抖音视频ID（去重用）")
     original_url = Column(String, nullable=False, comment="原始视频URL")
     converted_url = Column(String, nullable=True, comment="转换后的视频URL（如果适用）")
 
@@ -68,12 +73,12 @@ class VideoProcessTask(Base):
     # 时间戳
     created_at = Column(
         BigInteger,
-        default=lambda: int(datetime.utcnow().timestamp()),
+        default=lambda: int(time.time()),
         comment="创建时间戳"
     )
     updated_at = Column(
         BigInteger,
-        default=lambda: int(datetime.utcnow().timestamp()),
-        onupdate=lambda: int(datetime.utcnow().timestamp()),
+        default=lambda: int(time.time()),
+        onupdate=lambda: int(time.time()),
         comment="更新时间戳"
     )
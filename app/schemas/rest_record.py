@@ -5,11 +5,13 @@ from uuid import UUID
 from pydantic import BaseModel, Field, conint, validator
 
 
+# 北京时间时区
+CN_TZ = timezone(timedelta(hours=8))
+
+
 def to_cn_timezone(timestamp: int) -> datetime:
     """将时间戳转换为北京时间"""
-    utc_time = datetime.fromtimestamp(timestamp, tz=timezone.utc)
-    cn_time = utc_time.astimezone(timezone(timedelta(hours=8)))
-    return cn_time
+    return datetime.fromtimestamp(timestamp, tz=CN_TZ)
 
 
 class RestRecordBase(BaseModel):
@@ -41,6 +43,13 @@ class RestRecordCreate(RestRecordBase):
     pass
 
 
+class RestRecordBulkCreate(RestRecordBase):
+    rest_time: Optional[int] = Field(None,
+                                     description="休息时间戳，不传则使用当前时间",
+                                     example=1700000000,
+                                     title="休息时间")
+
+
 class RestRecordInDB(RestRecordBase):
     id: UUID = Field(..., description="记录ID")
     user_id: str = Field(..., description="用户ID")
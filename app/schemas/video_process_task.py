@@ -8,6 +8,9 @@ from uuid import UUID
 from pydantic import BaseModel, Field, HttpUrl, validator
 import re
 
+_URL_RE = re.compile(r'https?://\S+')
+_DOUYIN_DOMAINS = ('douyin.com', 'iesdouyin.com', 'v.douyin.com')
+
 
 class VideoProcessTaskBase(BaseModel):
     """视频处理任务基础模型"""
@@ -35,18 +38,15 @@ class VideoProcessRequest(BaseModel):
     @validator('video_url')
     def validate_url(cls, v):
         """验证URL是否包含有效的视频链接"""
-        # 检查是否包含http或https链接
-        url_pattern = r'https?://[^\s]+'
-        if not re.search(url_pattern, v):
+        # 检查是否包含http或https链接（只匹配一次）
+        match = _URL_RE.search(v)
+        if not match:
             raise ValueError('必须包含有效的URL')
 
-        # 提取URL并验证
-        match = re.search(url_pattern, v)
-        if match:
-            url = match.group()
-            # 验证是否为抖音相关URL
-            if not any(domain in url for domain in ['douyin.com', 'iesdouyin.com', 'v.douyin.com']):
-                raise ValueError('必须是抖音相关链接')
+        # 验证是否为抖音相关URL
+        url = match.group()
+        if not any(domain in url for domain in _DOUYIN_DOMAINS):
+            raise ValueError('必须是抖音相关链接')
 
         return v
 
@@ -80,7 +80,7 @@ class VideoProcessTaskResponse(BaseModel):
 
     task_id: UUID = Field(..., description="任务ID")
     status: str = Field(..., description="任务状态")
-    summary: Optional[str] = Field(None, description="AI总结（仅在完成时返回）")
+    summary: Optional[str] = Field(None, description="AI总结（处理中时为已生成的部分内容）")
     original_url: str = Field(..., description="原始URL")
     video_path: Optional[str] = Field(None, description="视频文件路径")
     audio_path: Optional[str] = Field(None, description="音频文件路径")
@@ -131,18 +131,15 @@ class VideoUrlRequest(BaseModel):
     @validator('url')
     def validate_url(cls, v):
         """验证URL是否包含有效的链接"""
-        # 检查是否包含http或https链接
-        url_pattern = r'https?://[^\s]+'
-        if not re.search(url_pattern, v):
+        # 检查是否包含http或https链接（只匹配一次）
+        match = _URL_RE.search(v)
+        if not match:
             raise ValueError('必须包含有效的URL')
 
-        # 提取URL并验证
-        match = re.search(url_pattern, v)
-        if match:
-            url = match.group()
-            # 验证是否为抖音相关URL
-            if not any(domain in url for domain in ['douyin.com', 'iesdouyin.com', 'v.douyin.com']):
-                raise ValueError('必须是抖音相关链接')
+        # 验证是否为抖音相关URL
+        url = match.group()
+        if not any(domain in url for domain in _DOUYIN_DOMAINS):
+            raise ValueError('必须是抖音相关链接')
 
         return v
 
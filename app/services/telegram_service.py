@@ -1,13 +1,25 @@
 import os
 import asyncio
 import logging
+import uuid
+from collections import defaultdict
 from typing import Optional, List, Any, Dict
+import aiofiles
 import aiohttp
 from telethon import TelegramClient, events
+from tenacity import (AsyncRetrying, retry_if_exception, stop_after_attempt,
+                      wait_exponential_jitter)
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+
+def _is_retryable_download(exc: BaseException) -> bool:
+    """超时、连接中断、响应体截断以及 429/5xx 可重试；其余 4xx（如链接失效）不重试"""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status == 429 or exc.status >= 500
+    return isinstance(exc, (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
 class TelegramService:
     def __init__(self):
         self.api_id = settings.TG_API_ID
@@ -22,6 +34,23 @@ class TelegramService:
             os.makedirs(self.download_path)
             
         self.client = None
+        # 每个 Bot 同一时间只进行一轮对话：回复按发送方匹配，并发请求会串消息
+        self._bot_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        # 按钮链接回退下载共用的 HTTP 会话（懒加载）
+        self._http_session: Optional[aiohttp.ClientSession] = None
+
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        """懒加载共享的 HTTP 会话，复用到 CDN 的 keep-alive 连接"""
+        if self._http_session is None or self._http_session.closed:
+            # 两次下载之间隔着一轮 Bot 对话（通常超过默认 15s），延长空闲连接保活时间，
+            # 让连接池与 TLS 会话在同一 worker 的连续下载间得以复用
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=20,
+                                               limit_per_host=8,
+                                               ttl_dns_cache=300,
+                                               keepalive_timeout=120),
+                timeout=aiohttp.ClientTimeout(total=300))
+        return self._http_session
 
     async def start(self):
         if not self.api_id or not self.api_hash:
@@ -44,6 +73,9 @@ class TelegramService:
             self.client = None
 
     async def stop(self):
+        if self._http_session and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
         if self.client:
             await self.client.disconnect()
             logger.info("Telegram Userbot disconnected.")
@@ -52,6 +84,7 @@ class TelegramService:
         """
         发送分享文本给指定的 Bot 并提取链接。
         支持视频和图片（含多图 Album）。
+        复用进程内常驻的 Userbot 连接；同一 Bot 的请求排队依次进行。
         :param share_text: 分享文本
         :param target_bot: 目标 Bot 的用户名
         :param timeout: 超时时间（秒）
@@ -61,6 +94,12 @@ class TelegramService:
             logger.error("Telegram client not started.")
             return None, None
 
+        async with self._bot_locks[target_bot]:
+            return await self._converse_with_bot(share_text, target_bot, timeout)
+
+    async def _converse_with_bot(self, share_text: str, target_bot: str, timeout: int):
+        """与 Bot 进行一轮对话（调用方需持有该 Bot 的锁）"""
+
         urls = {}
         # 收集到的媒体消息列表
         received_messages = []
@@ -114,10 +153,11 @@ class TelegramService:
             self.client.remove_event_handler(handler)
             return None, None
 
-    async def download_media(self, messages):
+    async def download_media(self, messages, download_dir: Optional[str] = None):
         """
         从消息中下载媒体（视频或图片）
         :param messages: 单个 Telethon 消息对象或列表
+        :param download_dir: 保存目录，默认为 TG_DOWNLOAD_PATH
         :return: 下载文件的路径列表
         """
         if not self.client:
@@ -139,7 +179,7 @@ class TelegramService:
                 media_info = "video" if msg.video else "photo"
                 logger.info(f"Downloading {media_info} from message {msg.id}...")
                 
-                path = await msg.download_media(file=self.download_path)
+                path = await msg.download_media(file=download_dir or self.download_path)
                 if path:
                     logger.info(f"Media downloaded to: {path}")
                     downloaded_paths.append(path)
@@ -149,17 +189,17 @@ class TelegramService:
             logger.error(f"Error downloading media: {str(e)}")
             return downloaded_paths
 
-    async def download_from_url(self, url: str) -> Optional[str]:
+    async def download_from_url(self, url: str, download_dir: Optional[str] = None) -> Optional[str]:
         """
         通过 URL 下载文件（用于按钮链接回退）
         :param url: 文件下载链接
+        :param download_dir: 保存目录，默认为 TG_DOWNLOAD_PATH
         :return: 下载后的本地文件路径，失败返回 None
         """
         try:
             logger.info(f"Downloading file from URL: {url}")
             
             # 从 URL 解析文件名，或者生成一个
-            import uuid
             file_ext = ".mp4" # 默认为 mp4
             if "?" in url:
                 base_url = url.split("?")[0]
@@ -172,33 +212,81 @@ class TelegramService:
                 file_ext = ".jpg"
                 
             filename = f"url_dl_{uuid.uuid4().hex[:8]}{file_ext}"
-            save_path = os.path.join(self.download_path, filename)
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, timeout=300) as response:
-                    if response.status == 200:
-                        content = await response.read()
-                        with open(save_path, 'wb') as f:
-                            f.write(content)
-                        logger.info(f"File downloaded from URL to: {save_path}")
-                        return save_path
-                    else:
-                        logger.error(f"Failed to download from URL. Status: {response.status}")
-                        return None
+            save_path = os.path.join(download_dir or self.download_path, filename)
+
+            # 网络抖动按指数退避（带抖动）重试，避免整个任务因一次断连而失败
+            async for attempt in AsyncRetrying(
+                    stop=stop_after_attempt(4),
+                    wait=wait_exponential_jitter(initial=1, max=10),
+                    retry=retry_if_exception(_is_retryable_download),
+                    reraise=True):
+                with attempt:
+                    await self._download_file(url, save_path)
+
+            logger.info(f"File downloaded from URL to: {save_path}")
+            return save_path
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout downloading from URL: {url}")
+            return None
+        except aiohttp.ClientResponseError as e:
+            logger.error(f"Failed to download from URL. Status: {e.status}")
+            return None
         except Exception as e:
             logger.error(f"Error downloading from URL: {str(e)}")
             return None
 
-    async def get_and_download_video(self, share_text: str, timeout: int = 45):
+    async def resolve_redirect(self, url: str, timeout: float = 5) -> Optional[str]:
+        """
+        解析短链的跳转目标（只读响应头，不跟随跳转、不下载内容）
+        :return: Location 头，无跳转或失败返回 None
+        """
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        }
+        try:
+            session = self._get_http_session()
+            async with session.head(url, headers=headers, allow_redirects=False,
+                                    timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                return response.headers.get("Location")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Failed to resolve redirect for {url}: {e}")
+            return None
+
+    async def _download_file(self, url: str, save_path: str):
+        """流式下载到目标路径；失败时删除写了一半的文件，重试从头写入"""
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        }
+        session = self._get_http_session()
+        try:
+            async with session.get(url, headers=headers) as response:
+                response.raise_for_status()
+                # 分块流式写盘，内存占用与文件大小无关；
+                # aiofiles 每次 write 都要切到线程池，按 1MB 块写以减少线程切换
+                async with aiofiles.open(save_path, 'wb') as f:
+                    if response.content_length and hasattr(os, "posix_fallocate"):
+                        # 预分配空间，减少大文件的磁盘碎片（文件系统不支持时 glibc 会逐块写零，放到线程中）
+                        await asyncio.to_thread(os.posix_fallocate, f.fileno(), 0, response.content_length)
+                    async for chunk in response.content.iter_chunked(1 << 20):
+                        await f.write(chunk)
+        except BaseException:
+            await asyncio.to_thread(self._remove_partial, save_path)
+            raise
+
+    @staticmethod
+    def _remove_partial(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    async def get_and_download_video(self, share_text: str, timeout: int = 45, download_dir: Optional[str] = None):
         """
         整合流程：自动路由 Bot -> 发送文本 -> 获取消息 -> 下载所有媒体文件
         如果 Bot 返回了按钮链接（针对大文件），则通过 URL 下载。
         :param share_text: 分享文本
         :param timeout: 超时时间
+        :param download_dir: 保存目录，默认为 TG_DOWNLOAD_PATH
         :return: 下载后的文件路径列表 (List[str]) 或 None
         """
         # 简单的路由逻辑
@@ -210,7 +298,7 @@ class TelegramService:
         
         # 1. 优先尝试直接媒体消息
         if media_msgs:
-            return await self.download_media(media_msgs)
+            return await self.download_media(media_msgs, download_dir)
         
         # 2. 如果没有媒体消息，检查按钮链接（针对超大视频的回退）
         if urls:
@@ -221,14 +309,14 @@ class TelegramService:
             for key in priority_keys:
                 if key in urls:
                     logger.info(f"Found priority URL key: {key}")
-                    dl_path = await self.download_from_url(urls[key])
+                    dl_path = await self.download_from_url(urls[key], download_dir)
                     if dl_path:
                         return [dl_path]
             
             # 如果没匹配到优先级 Key，但有唯一链接，也试一下
             if len(urls) == 1:
                 url = list(urls.values())[0]
-                dl_path = await self.download_from_url(url)
+                dl_path = await self.download_from_url(url, download_dir)
                 if dl_path:
                     return [dl_path]
 
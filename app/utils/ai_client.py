@@ -3,65 +3,210 @@ AI客户端抽象层
 支持多种AI服务切换（硅基AI、OpenAI等）
 """
 
-import json
+import asyncio
+import io
+import threading
+import time
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Optional
+from typing import Awaitable, Callable, List, Optional
 
 import httpx
+import orjson
 
 from app.core.config import settings
 
 
+# 流式总结时回调已生成文本的最小间隔（秒）
+SUMMARY_PROGRESS_INTERVAL = 0.5
+# 长文本分段时优先切在这些句末符号之后
+_SENTENCE_ENDS = ("。", "！", "？", "!", "?", "\n")
+
+# 流式总结进度回调：参数为目前已生成的完整文本
+ProgressCallback = Callable[[str], Awaitable[None]]
+
+# 上传音频时按扩展名声明 Content-Type
+_AUDIO_MIME_TYPES = {
+    ".aac": "audio/aac",
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".wav": "audio/wav",
+}
+
+
+def _audio_mime_type(filename: str) -> str:
+    return _AUDIO_MIME_TYPES.get(Path(filename).suffix.lower(), "application/octet-stream")
+
+
+def _split_text(text: str, max_chars: int) -> List[str]:
+    """按句子边界把长文本切成不超过 max_chars 字的片段（找不到句末符号时按长度硬切）"""
+    chunks = []
+    start = 0
+    while len(text) - start > max_chars:
+        end = start + max_chars
+        cut = max(text.rfind(mark, start, end) for mark in _SENTENCE_ENDS) + 1
+        if cut <= start:
+            cut = end
+        chunks.append(text[start:cut])
+        start = cut
+    chunks.append(text[start:])
+    return chunks
+
+
 class AIClient(ABC):
     """AI客户端抽象基类"""
 
+    timeout = 300  # 5分钟超时
+    # 可直接上传、无需转码的音频编码（ffprobe codec_name），其余统一转为 16kHz 单声道 WAV
+    accepted_audio_codecs = frozenset()
+    # 同一进程内同时在途的语音识别请求上限，超出的请求排队等待
+    asr_concurrency = max(1, settings.ASR_CONCURRENCY)
+    # 长文本分段总结时同时在途的分段请求上限（进程内共享），避免一次性向服务商并发大量请求
+    summary_concurrency = max(1, settings.SUMMARY_CONCURRENCY)
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._asr_semaphore = asyncio.Semaphore(self.asr_concurrency)
+        self._summary_semaphore = asyncio.Semaphore(self.summary_concurrency)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """懒加载共享的 HTTP 客户端（HTTP/2 多路复用 + keep-alive，并发请求共用连接）"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=200, max_keepalive_connections=100)
+            )
+        return self._client
+
+    async def close(self):
+        """关闭共享的 HTTP 客户端"""
+        if self._client and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
     @abstractmethod
-    async def recognize_speech(self, audio_path: Path) -> str:
-        """语音识别 - 将音频转换为文字"""
+    async def recognize_speech(self, audio: bytes, filename: str) -> str:
+        """语音识别 - 将音频转换为文字（audio 为内存中的音频数据，filename 用于声明格式）"""
         pass
 
     @abstractmethod
-    async def summarize_text(self, text: str, max_length: Optional[int] = None) -> str:
-        """文本总结 - 对字幕进行总结和精简"""
+    async def summarize_text(
+        self,
+        text: str,
+        max_length: Optional[int] = None,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> str:
+        """文本总结 - 对字幕进行总结和精简（on_progress 用于接收流式生成的中间结果）"""
         pass
 
+    async def summarize_long_text(
+        self,
+        text: str,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> str:
+        """
+        长文本总结：超过 SUMMARY_CHUNK_CHARS 时分段并发总结（受 summary_concurrency 限制），再对各段总结做一次汇总
+        未超过时等同于 summarize_text；进度回调只用于最终（汇总）阶段
+        """
+        chunks = _split_text(text, settings.SUMMARY_CHUNK_CHARS)
+        if len(chunks) == 1:
+            return await self.summarize_text(text, on_progress=on_progress)
+        partials = await asyncio.gather(*[self._summarize_chunk(chunk) for chunk in chunks])
+        return await self.summarize_text("\n\n".join(partials), on_progress=on_progress)
+
+    async def _summarize_chunk(self, chunk: str) -> str:
+        async with self._summary_semaphore:
+            return await self.summarize_text(chunk)
+
+    async def _stream_chat_completion(
+        self,
+        model: str,
+        prompt: str,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> str:
+        """以 SSE 流式调用 OpenAI 兼容的 chat/completions，按间隔回调已生成的文本"""
+        client = self._get_client()
+        parts: List[str] = []
+        last_progress = time.monotonic()
+        async with client.stream(
+            "POST",
+            f"{self.base_url}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            # orjson 直接输出 UTF-8：字幕原文不会像 json.dumps 那样被转义成 \uXXXX，请求体更小
+            content=orjson.dumps({
+                "model": model,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                "temperature": 0.3,
+                "max_tokens": 2000,
+                "stream": True
+            })
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                raise Exception(f"文本总结失败: {response.status_code} - {body.decode(errors='ignore')}")
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+                choices = orjson.loads(payload).get("choices") or []
+                delta = choices[0].get("delta", {}).get("content") if choices else None
+                if not delta:
+                    continue
+                parts.append(delta)
+                if on_progress and time.monotonic() - last_progress >= SUMMARY_PROGRESS_INTERVAL:
+                    last_progress = time.monotonic()
+                    await on_progress("".join(parts))
+
+        return "".join(parts)
+
 
 class SiliconFlowClient(AIClient):
     """硅基AI客户端 - 使用OpenAI兼容格式"""
 
     def __init__(self):
+        super().__init__()
         self.api_key = settings.SILICONFLOW_API_KEY
         self.base_url = "https://api.siliconflow.cn/v1"
         self.voice_model = getattr(settings, 'AI_VOICE_MODEL', 'Qwen/QwQ-32B')
         self.summary_model = getattr(settings, 'AI_SUMMARY_MODEL', 'Qwen/QwQ-32B')
-        self.timeout = 300  # 5分钟超时
 
-    async def recognize_speech(self, audio_path: Path) -> str:
+    async def recognize_speech(self, audio: bytes, filename: str) -> str:
         """
         语音识别 - 使用硅基AI的语音识别能力
         硅基AI使用 multipart/form-data 格式上传文件
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                with open(audio_path, 'rb') as f:
-                    files = {'file': (audio_path.name, f, 'audio/mpeg')}
-                    data = {
-                        'model': 'FunAudioLLM/SenseVoiceSmall'
-                    }
-                    headers = {
-                        "Authorization": f"Bearer {self.api_key}"
-                    }
+            async with self._asr_semaphore:
+                client = self._get_client()
+                files = {'file': (filename, audio, _audio_mime_type(filename))}
+                data = {
+                    'model': 'FunAudioLLM/SenseVoiceSmall'
+                }
+                headers = {
+                    "Authorization": f"Bearer {self.api_key}"
+                }
 
-                    response = await client.post(
-                        f"{self.base_url}/audio/transcriptions",
-                        headers=headers,
-                        data=data,
-                        files=files
-                    )
+                response = await client.post(
+                    f"{self.base_url}/audio/transcriptions",
+                    headers=headers,
+                    data=data,
+                    files=files
+                )
 
                 if response.status_code == 200:
-                    result = response.json()
+                    result = orjson.loads(response.content)
                     # 硅基AI返回的是包含text字段的JSON
                     return result.get('text', '') or result.get('result', '') or ''
                 else:
@@ -70,7 +215,12 @@ class SiliconFlowClient(AIClient):
         except Exception as e:
             raise Exception(f"硅基AI语音识别失败: {str(e)}")
 
-    async def summarize_text(self, text: str, max_length: Optional[int] = None) -> str:
+    async def summarize_text(
+        self,
+        text: str,
+        max_length: Optional[int] = None,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> str:
         """
         文本总结 - 使用硅基AI对字幕进行总结和精简
         """
@@ -142,31 +292,7 @@ class SiliconFlowClient(AIClient):
             if max_length:
                 prompt += f"\n（请控制在{max_length}字以内）"
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": self.summary_model,
-                        "messages": [
-                            {
-                                "role": "user",
-                                "content": prompt
-                            }
-                        ],
-                        "temperature": 0.3,
-                        "max_tokens": 2000
-                    }
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    return result["choices"][0]["message"]["content"]
-                else:
-                    raise Exception(f"文本总结失败: {response.status_code} - {response.text}")
+            return await self._stream_chat_completion(self.summary_model, prompt, on_progress)
 
         except Exception as e:
             raise Exception(f"硅基AI文本总结失败: {str(e)}")
@@ -175,34 +301,37 @@ class SiliconFlowClient(AIClient):
 class OpenAIClient(AIClient):
     """OpenAI客户端 - 便于切换到OpenAI服务"""
 
+    # ADTS 裸 AAC 不在 OpenAI 支持的上传格式内，仅直传 MP3
+    accepted_audio_codecs = frozenset({"mp3"})
+
     def __init__(self):
+        super().__init__()
         self.api_key = settings.OPENAI_API_KEY if hasattr(settings, 'OPENAI_API_KEY') else ""
         self.base_url = "https://api.openai.com/v1"
         self.voice_model = "whisper-1"
         self.summary_model = "gpt-4"
-        self.timeout = 300
 
-    async def recognize_speech(self, audio_path: Path) -> str:
+    async def recognize_speech(self, audio: bytes, filename: str) -> str:
         """OpenAI语音识别 - 使用 multipart/form-data 格式"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                with open(audio_path, 'rb') as f:
-                    files = {'file': (audio_path.name, f, 'audio/mpeg')}
-                    data = {
-                        'model': self.voice_model,
-                        'response_format': 'text',
-                        'language': 'zh'
-                    }
-                    headers = {
-                        "Authorization": f"Bearer {self.api_key}"
-                    }
+            async with self._asr_semaphore:
+                client = self._get_client()
+                files = {'file': (filename, audio, _audio_mime_type(filename))}
+                data = {
+                    'model': self.voice_model,
+                    'response_format': 'text',
+                    'language': 'zh'
+                }
+                headers = {
+                    "Authorization": f"Bearer {self.api_key}"
+                }
 
-                    response = await client.post(
-                        f"{self.base_url}/audio/transcriptions",
-                        headers=headers,
-                        data=data,
-                        files=files
-                    )
+                response = await client.post(
+                    f"{self.base_url}/audio/transcriptions",
+                    headers=headers,
+                    data=data,
+                    files=files
+                )
 
                 if response.status_code == 200:
                     return response.text
@@ -212,7 +341,12 @@ class OpenAIClient(AIClient):
         except Exception as e:
             raise Exception(f"OpenAI语音识别失败: {str(e)}")
 
-    async def summarize_text(self, text: str, max_length: Optional[int] = None) -> str:
+    async def summarize_text(
+        self,
+        text: str,
+        max_length: Optional[int] = None,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> str:
         """OpenAI文本总结"""
         try:
             prompt = f"""请对以下视频字幕进行总结和精简：
@@ -231,51 +365,93 @@ class OpenAIClient(AIClient):
             if max_length:
                 prompt += f"\n（请控制在{max_length}字以内）"
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": self.summary_model,
-                        "messages": [
-                            {
-                                "role": "user",
-                                "content": prompt
-                            }
-                        ],
-                        "temperature": 0.3,
-                        "max_tokens": 2000
-                    }
+            return await self._stream_chat_completion(self.summary_model, prompt, on_progress)
+
+        except Exception as e:
+            raise Exception(f"OpenAI文本总结失败: {str(e)}")
+
+
+_whisper_pipeline = None
+_whisper_lock = threading.Lock()
+
+
+def _get_whisper_pipeline():
+    """懒加载 faster-whisper 批量推理管线（进程内只加载一次模型权重）"""
+    global _whisper_pipeline
+    if _whisper_pipeline is None:
+        with _whisper_lock:
+            if _whisper_pipeline is None:
+                # 可选依赖：仅在 AI_PROVIDER=faster_whisper 时需要安装
+                from faster_whisper import BatchedInferencePipeline, WhisperModel
+
+                model = WhisperModel(
+                    settings.WHISPER_MODEL,
+                    device=settings.WHISPER_DEVICE,
+                    compute_type=settings.WHISPER_COMPUTE_TYPE
                 )
+                _whisper_pipeline = BatchedInferencePipeline(model=model)
+    return _whisper_pipeline
 
-                if response.status_code == 200:
-                    result = response.json()
-                    return result["choices"][0]["message"]["content"]
-                else:
-                    raise Exception(f"OpenAI文本总结失败: {response.status_code} - {response.text}")
 
+class FasterWhisperClient(SiliconFlowClient):
+    """本地 faster-whisper 语音识别，文本总结仍走硅基AI"""
+
+    # 本地解码（PyAV），常见音频编码均可直接读取
+    accepted_audio_codecs = frozenset({"aac", "mp3"})
+    # 单份模型权重在 GPU/CPU 上已按批并行，多个推理同时跑只会互相争抢
+    asr_concurrency = 1
+
+    def _transcribe(self, audio: bytes) -> str:
+        pipeline = _get_whisper_pipeline()
+        # 批量管线内置 VAD 切分，按 30s 片段打包推理
+        segments, _ = pipeline.transcribe(
+            io.BytesIO(audio),
+            batch_size=settings.WHISPER_BATCH_SIZE
+        )
+        return "".join(segment.text for segment in segments)
+
+    async def recognize_speech(self, audio: bytes, filename: str) -> str:
+        """语音识别 - 在线程池中执行本地推理，避免阻塞事件循环"""
+        try:
+            async with self._asr_semaphore:
+                return await asyncio.to_thread(self._transcribe, audio)
         except Exception as e:
-            raise Exception(f"OpenAI文本总结失败: {str(e)}")
+            raise Exception(f"faster-whisper语音识别失败: {str(e)}")
+
+
+_ai_client: Optional[AIClient] = None
 
 
 # AI客户端工厂
 def get_ai_client() -> AIClient:
     """
-    获取AI客户端实例
-    根据配置自动选择使用硅基AI或OpenAI
+    获取AI客户端实例（进程内单例，复用连接池与并发限制）
+    根据配置自动选择使用硅基AI、本地faster-whisper或OpenAI
     """
+    global _ai_client
+    if _ai_client is not None:
+        return _ai_client
+
     ai_provider = getattr(settings, 'AI_PROVIDER', 'siliconflow').lower()
 
     if ai_provider == 'siliconflow':
         if not settings.SILICONFLOW_API_KEY:
             raise ValueError("SILICONFLOW_API_KEY 未配置")
-        return SiliconFlowClient()
+        _ai_client = SiliconFlowClient()
+    elif ai_provider == 'faster_whisper':
+        if not settings.SILICONFLOW_API_KEY:
+            raise ValueError("SILICONFLOW_API_KEY 未配置（faster_whisper 模式下用于文本总结）")
+        _ai_client = FasterWhisperClient()
     elif ai_provider == 'openai':
         if not hasattr(settings, 'OPENAI_API_KEY') or not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY 未配置")
-        return OpenAIClient()
+        _ai_client = OpenAIClient()
     else:
-        raise ValueError(f"不支持的AI提供商: {ai_provider}")
\ No newline at end of file
+        raise ValueError(f"不支持的AI提供商: {ai_provider}")
+    return _ai_client
+
+
+async def close_ai_client():
+    """关闭已创建的AI客户端（应用关闭时调用）"""
+    if _ai_client is not None:
+        await _ai_client.close()
\ No newline at end of file
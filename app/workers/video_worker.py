@@ -0,0 +1,82 @@
+"""
+后台任务队列
+视频处理、Telegram 下载等长任务统一进入进程内队列，由固定数量的常驻消费者执行，
+不再挂在请求的 BackgroundTasks 上与请求处理争抢
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional
+
+from app.core.config import settings
+from app.core.services.video_processor_service import VideoProcessorService
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """进程内异步任务队列"""
+
+    def __init__(self, name: str, concurrency: int):
+        """
+        初始化任务队列
+
+        Args:
+            name: 队列名称（用于日志）
+            concurrency: 常驻消费者数量，即同时执行的任务上限
+        """
+        self.name = name
+        self.concurrency = concurrency
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def start(self):
+        """启动消费者（需在事件循环内调用）"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._consume(i)) for i in range(self.concurrency)
+        ]
+        logger.info(f"任务队列 {self.name} 已启动，消费者数量: {self.concurrency}")
+
+    async def stop(self):
+        """停止消费者，未执行的任务随进程退出丢弃"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def enqueue(self, func: Callable[..., Awaitable[Any]], *args, **kwargs):
+        """提交任务，只传递基础类型参数（如 task_id、url），不要传递数据库会话"""
+        if self._queue is None:
+            raise RuntimeError(f"任务队列 {self.name} 未启动")
+        self._queue.put_nowait((func, args, kwargs))
+
+    async def _consume(self, index: int):
+        while True:
+            func, args, kwargs = await self._queue.get()
+            try:
+                await func(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"任务队列 {self.name}[{index}] 执行 {func.__name__} 失败: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+
+async def process_video_task(task_id: str, video_url: str):
+    """后台视频处理任务（使用独立的数据库会话，不依赖请求生命周期）"""
+    # 任务对象在整个流程中只由本会话修改：commit 后不过期属性，避免每次提交后回查整行。
+    # 每次 commit 后连接即归还连接池，且属性访问不会再触发 SELECT，
+    # 因此下载/识别/总结等长耗时阶段不占用数据库连接
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        processor = VideoProcessorService(db)
+        await processor.process_video(task_id, video_url)
+    finally:
+        db.close()
+
+
+job_queue = JobQueue("background", settings.BACKGROUND_WORKER_CONCURRENCY)
@@ -1,5 +1,5 @@
 import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
 
 # 模拟 schema 和 model
@@ -16,11 +16,7 @@ class MockLastRecord:
         self.rest_type = rest_type
         self.rest_time = int(datetime.now().timestamp())
 
-def to_cn_timezone(timestamp: int) -> datetime:
-    from datetime import timedelta, timezone
-    utc_time = datetime.fromtimestamp(timestamp, tz=timezone.utc)
-    cn_time = utc_time.astimezone(timezone(timedelta(hours=8)))
-    return cn_time
+CN_TZ = timezone(timedelta(hours=8))
 
 def simulate_logic(last_type, input_type):
     # --- 核心逻辑模拟开始 ---
@@ -31,7 +27,7 @@ def simulate_logic(last_type, input_type):
         else:
             rest_type = 0
             
-    cn_now = to_cn_timezone(int(datetime.now().timestamp()))
+    cn_now = datetime.now(CN_TZ)
     month_str = cn_now.strftime('%m月')
     # --- 核心逻辑模拟结束 ---
     return rest_type, month_str
@@ -0,0 +1,111 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+from app.api.v1.endpoints.rest_records import (_max_streak, _missing_dates,
+                                               _pair_sessions)
+
+CN_TZ = timezone(timedelta(hours=8))
+
+
+class MockRecord:
+    def __init__(self, rest_type, dt):
+        self.rest_type = rest_type
+        self.rest_time = int(dt.timestamp())
+
+
+def cn(*args):
+    return datetime(*args, tzinfo=CN_TZ)
+
+
+async def _stream(records):
+    for r in records:
+        yield r
+
+
+def pair(records):
+    async def collect():
+        return [s async for s in _pair_sessions(_stream(records))]
+    return asyncio.run(collect())
+
+
+def test_pair_sessions():
+    # 空区间 -> 无会话
+    assert pair([]) == []
+
+    # 正常配对
+    sleep = MockRecord(0, cn(2025, 3, 1, 23, 0))
+    wake = MockRecord(1, cn(2025, 3, 2, 7, 0))
+    sessions = pair([sleep, wake])
+    assert len(sessions) == 1
+    assert sessions[0]["sleep"] is sleep and sessions[0]["wake"] is wake
+    assert sessions[0]["dur"] == 8
+
+    # 跨年午夜：以起床记录配对，时长按实际间隔计算
+    sleep = MockRecord(0, cn(2025, 12, 31, 23, 30))
+    wake = MockRecord(1, cn(2026, 1, 1, 7, 30))
+    sessions = pair([sleep, wake])
+    assert len(sessions) == 1 and sessions[0]["dur"] == 8
+
+    # 开头孤立的起床记录
+    wake = MockRecord(1, cn(2025, 3, 2, 7, 0))
+    sessions = pair([wake])
+    assert sessions == [{"sleep": None, "wake": wake, "dur": None}]
+
+    # 连续两条睡眠：前一条无法配对，后一条与起床配对
+    s1 = MockRecord(0, cn(2025, 3, 1, 22, 0))
+    s2 = MockRecord(0, cn(2025, 3, 1, 23, 0))
+    wake = MockRecord(1, cn(2025, 3, 2, 7, 0))
+    sessions = pair([s1, s2, wake])
+    assert sessions[0] == {"sleep": s1, "wake": None, "dur": None}
+    assert sessions[1]["sleep"] is s2 and sessions[1]["wake"] is wake
+
+    # 间隔超过 24 小时：睡眠与起床各自孤立
+    sleep = MockRecord(0, cn(2025, 3, 1, 23, 0))
+    wake = MockRecord(1, cn(2025, 3, 3, 7, 0))
+    sessions = pair([sleep, wake])
+    assert sessions == [{"sleep": sleep, "wake": None, "dur": None},
+                        {"sleep": None, "wake": wake, "dur": None}]
+
+    # 末尾未配对的睡眠会被输出
+    sleep = MockRecord(0, cn(2025, 3, 1, 23, 0))
+    sessions = pair([sleep])
+    assert sessions == [{"sleep": sleep, "wake": None, "dur": None}]
+
+
+def test_max_streak():
+    assert _max_streak(bytearray(367)) == 0
+
+    days = bytearray(367)
+    days[0] = 1
+    assert _max_streak(days) == 1
+
+    # 中断后重新计数，取最长一段
+    for d in (10, 11, 12, 20, 21):
+        days[d] = 1
+    assert _max_streak(days) == 3
+
+    # 延续到年末（闰年 366 天）
+    for d in range(360, 366):
+        days[d] = 1
+    assert _max_streak(days) == 6
+
+
+def test_missing_dates():
+    start = date(2025, 1, 1)
+    flags = bytearray(367)
+    flags[1] = 1
+
+    assert _missing_dates(flags, start, date(2025, 1, 3)) == [
+        "2025-01-01", "2025-01-03"
+    ]
+    # 单日区间
+    assert _missing_dates(flags, start, start) == ["2025-01-01"]
+    # 结束日期早于开始日期（查询未来年份）-> 空
+    assert _missing_dates(flags, start, date(2024, 12, 31)) == []
+
+
+if __name__ == "__main__":
+    test_pair_sessions()
+    test_max_streak()
+    test_missing_dates()
+    print("✅ All annual summary scenarios passed!")
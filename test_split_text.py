@@ -0,0 +1,37 @@
+from app.utils.ai_client import _split_text
+
+
+def test_split_text():
+    # 短文本：不切分
+    assert _split_text("你好。", 10) == ["你好。"]
+    assert _split_text("", 10) == [""]
+
+    # 恰好等于上限：不切分
+    text = "a" * 10
+    assert _split_text(text, 10) == [text]
+
+    # 超过上限：切在窗口内最后一个句末符号之后
+    text = "abcd。efghij"
+    assert _split_text(text, 10) == ["abcd。", "efghij"]
+
+    # 句末符号正好位于窗口最后一位
+    assert _split_text("abcd。efgh", 5) == ["abcd。", "efgh"]
+
+    # 窗口内有多个句末符号时取最靠后的一个
+    assert _split_text("ab！cd？efgh", 7) == ["ab！cd？", "efgh"]
+
+    # 无任何分隔符：按长度硬切
+    text = "x" * 25
+    chunks = _split_text(text, 10)
+    assert chunks == ["x" * 10, "x" * 10, "x" * 5]
+
+    # 任意切分都不丢字、不超上限
+    text = ("这是一句话。" * 50) + ("没有句号的长段落" * 20)
+    chunks = _split_text(text, 40)
+    assert "".join(chunks) == text
+    assert all(len(c) <= 40 for c in chunks)
+
+
+if __name__ == "__main__":
+    test_split_text()
+    print("✅ All split_text scenarios passed!")